@@ -0,0 +1,62 @@
+import argparse
+import socketserver
+import time
+from Comms.transmitter import *
+
+
+class RPiStubHandler(socketserver.BaseRequestHandler):
+    def handle(self):
+        server: RPiStub = self.server
+        print(f"Connection from {self.client_address}")
+        try:
+            while True:
+                payload = recv_frame(self.request)
+                if payload[0] == FRAME_HELLO:
+                    _, session = HELLO_PAYLOAD.unpack(payload)
+                    if session != server.session:
+                        server.session = session
+                        server.last_seq = None
+                    continue
+                if payload[0] != FRAME_COMMAND:
+                    continue
+                seq, message = decode_command(payload)
+                time.sleep(server.delay)
+                # Commands resent after a reconnect have been seen before; acknowledge them without running them again.
+                if server.last_seq is None or seq_after(seq, server.last_seq):
+                    print(f"#{seq}: {message}")
+                    server.received.append(message)
+                    server.last_seq = seq
+                self.request.sendall(encode_ack(server.last_seq))
+        except ConnectionError:
+            print(f"Connection from {self.client_address} closed")
+
+
+class RPiStub(socketserver.ThreadingTCPServer):
+    """
+    Stand-in for the RPi end of the link, for testing without the robot. Prints and records every command received.
+    """
+    allow_reuse_address = True
+    daemon_threads = True
+
+    def __init__(self, host="127.0.0.1", port=RPI_PORT, delay=0.0):
+        super().__init__((host, port), RPiStubHandler)
+        self.delay = delay  # Seconds to wait before acknowledging each command, to mimic a slow link.
+        self.session = None
+        self.last_seq = None
+        self.received = []
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Stand-in RPi that acknowledges commands sent by the Transmitter.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=RPI_PORT)
+    parser.add_argument("--delay", type=float, default=0.0, help="seconds to wait before acknowledging a command")
+    args = parser.parse_args()
+
+    with RPiStub(args.host, args.port, args.delay) as server:
+        print(f"RPi stand-in listening on {args.host}:{args.port}")
+        server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
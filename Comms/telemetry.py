@@ -0,0 +1,114 @@
+import json
+import struct
+from typing import List, Sequence
+from Map.obstacle import Obstacle
+from Map.position import RobotPosition
+from Robot.commands import Command, StraightCommand, TurnCommand
+from Settings.attributes import *
+
+# The backend streams a plan to a viewer over a WebSocket (see /telemetry in backend.py) as:
+#   One text message: the plan, as JSON shaped like a /plan/batch result.
+#   Binary messages, one every 1 / rate seconds, each holding one or more poses. A pose is its type (1 byte), the
+#   command index (2 bytes), then the simulated time in seconds, x, y and angle in degrees (4 byte floats each).
+#   Positions are in the simulator's scaled units, as Robot.pos.
+# Types of pose:
+#   POSE_START: Where the robot starts, before any command.
+#   POSE_MOVE: Where the robot is while carrying out the command.
+#   POSE_COMMAND: Where the robot is once the command is done.
+#   POSE_DONE: Where the robot ends up after the last command. Always the last pose sent.
+POSE_PAYLOAD = struct.Struct(">BHffff")
+POSE_START = 1
+POSE_MOVE = 2
+POSE_COMMAND = 3
+POSE_DONE = 4
+
+DIRECTION_LETTERS = {Direction.TOP: "T", Direction.BOTTOM: "B", Direction.LEFT: "L", Direction.RIGHT: "R"}
+
+
+def layout_string(obstacles: Sequence[Obstacle]) -> str:
+    """
+    Describe obstacles the way the backend's endpoints take them, such as "75,25,T,1;125,75,L,2".
+    """
+    return ";".join(f"{obstacle.pos.x // SCALING_FACTOR},{obstacle.pos.y // SCALING_FACTOR},"
+                    f"{DIRECTION_LETTERS[obstacle.pos.direction]},{obstacle.index}" for obstacle in obstacles)
+
+
+def decode_poses(data: bytes):
+    """
+    Decode a binary message into its poses, as (type, command index, time, x, y, angle) tuples.
+    """
+    return list(POSE_PAYLOAD.iter_unpack(data))
+
+
+class PoseStream:
+    def __init__(self, commands: List[Command], start: RobotPosition, rate=TELEMETRY_RATE, speed=1.0):
+        """
+        Carries out commands from start, one tick of 1 / FRAMES simulated seconds at a time like Robot.update(), and
+        encodes the robot's poses for a viewer. Nothing is drawn.
+
+        commands -> Fresh commands, as they keep track of their own execution.
+        rate -> Messages per real second that next_message() is called for.
+        speed -> Simulated seconds per real second.
+        """
+        self.commands = commands
+        self.pos = start.copy()
+        self.current = 0  # Index of the command being carried out.
+        self.ticks = 0  # Ticks simulated so far.
+        self.ticks_per_message = FRAMES * speed / rate
+        self.ticks_owed = 0.0
+
+    # The commands move whatever they are carried out by through these, see Command.process_one_tick().
+    def straight(self, dist):
+        StraightCommand(dist).apply_on_pos(self.pos)
+
+    def turn(self, d_angle, rev):
+        TurnCommand(d_angle, rev).apply_on_pos(self.pos)
+
+    def done(self):
+        return self.current >= len(self.commands)
+
+    def encode(self, kind) -> bytes:
+        return POSE_PAYLOAD.pack(kind, self.current, self.ticks / FRAMES, self.pos.x, self.pos.y, self.pos.angle)
+
+    def start_message(self) -> bytes:
+        return self.encode(POSE_START)
+
+    def next_message(self) -> bytes:
+        """
+        Advance by the ticks of one message, and encode the end of every command finished on the way and where the
+        robot is now.
+        """
+        poses = []
+        self.ticks_owed += self.ticks_per_message
+        while not self.done():
+            command = self.commands[self.current]
+            # Commands without ticks, such as instant scans, do not take a tick.
+            if command.total_ticks:
+                if self.ticks_owed < 1:
+                    break
+                self.ticks_owed -= 1
+                self.ticks += 1
+                command.process_one_tick(self)
+            if command.ticks <= 0:
+                poses.append(self.encode(POSE_COMMAND))
+                self.current += 1
+        poses.append(self.encode(POSE_DONE if self.done() else POSE_MOVE))
+        return b"".join(poses)
+
+
+def receive_telemetry(data: str, url=TELEMETRY_URL, rate=TELEMETRY_RATE, speed=1.0):
+    """
+    Ask the backend at url to plan the layout data, such as made by layout_string(), and stream the robot carrying
+    out the plan. Yields ("plan", result) once planning is done, then ("poses", poses) as they arrive, with the poses
+    decoded by decode_poses(). Blocks while waiting for the backend, so it is meant for a thread of its own.
+    """
+    # Imported here so that the backend and planner never need the client.
+    from websockets.sync.client import connect
+
+    with connect(url) as websocket:
+        websocket.send(json.dumps({"data": data, "rate": rate, "speed": speed}))
+        for message in websocket:
+            if isinstance(message, str):
+                yield "plan", json.loads(message)
+            else:
+                yield "poses", decode_poses(message)
@@ -0,0 +1,152 @@
+import os
+import socket
+import struct
+import time
+from typing import List
+from Settings.attributes import *
+
+# Every frame is a 2 byte big-endian payload length followed by the payload. Payloads start with their type:
+#   FRAME_COMMAND: type (1 byte), sequence number (2 bytes), opcode (1 byte), value (2 bytes).
+#   FRAME_ACK: type (1 byte), sequence number (2 bytes). Acks are cumulative: every command up to and including
+#   that sequence number has been received.
+#   FRAME_HELLO: type (1 byte), session id (4 bytes). Sent first on every connection. Sequence numbers only mean
+#   something within one session, so a restarted sender is not mistaken for one resending old commands.
+FRAME_HEADER = struct.Struct(">H")
+FRAME_COMMAND = 1
+FRAME_ACK = 2
+FRAME_HELLO = 3
+COMMAND_PAYLOAD = struct.Struct(">BHBH")
+ACK_PAYLOAD = struct.Struct(">BH")
+HELLO_PAYLOAD = struct.Struct(">BI")
+
+# Two letter prefixes of the messages made by Command.convert_to_message(), in opcode order.
+OPCODES = ["SF", "SB", "LF", "RF", "LB", "RB", "P_"]
+
+SEQ_MODULO = 1 << 16
+
+
+def encode_command(seq: int, message: str) -> bytes:
+    """
+    Encode a command message such as "SF030", "RF090" or "P___3" into a frame.
+    """
+    opcode = OPCODES.index(message[:2])
+    value = int(message[2:].lstrip("_") or 0)
+    return frame(COMMAND_PAYLOAD.pack(FRAME_COMMAND, seq, opcode, value))
+
+
+def decode_command(payload: bytes):
+    """
+    Decode a command payload into its sequence number and message.
+    """
+    _, seq, opcode, value = COMMAND_PAYLOAD.unpack(payload)
+    prefix = OPCODES[opcode]
+    message = f"P___{value}" if prefix == "P_" else f"{prefix}{value:03}"
+    return seq, message
+
+
+def encode_ack(seq: int) -> bytes:
+    return frame(ACK_PAYLOAD.pack(FRAME_ACK, seq))
+
+
+def encode_hello(session: int) -> bytes:
+    return frame(HELLO_PAYLOAD.pack(FRAME_HELLO, session))
+
+
+def frame(payload: bytes) -> bytes:
+    return FRAME_HEADER.pack(len(payload)) + payload
+
+
+def seq_after(a: int, b: int) -> bool:
+    """
+    Whether sequence number a comes after b, allowing for wrap around.
+    """
+    return 0 < (a - b) % SEQ_MODULO < SEQ_MODULO // 2
+
+
+def recv_exactly(sock: socket.socket, size: int) -> bytes:
+    data = b""
+    while len(data) < size:
+        chunk = sock.recv(size - len(data))
+        if not chunk:
+            raise ConnectionError("Connection closed by peer")
+        data += chunk
+    return data
+
+
+def recv_frame(sock: socket.socket) -> bytes:
+    size, = FRAME_HEADER.unpack(recv_exactly(sock, FRAME_HEADER.size))
+    return recv_exactly(sock, size)
+
+
+class Transmitter:
+    def __init__(self, host=RPI_HOST, port=RPI_PORT, window=RPI_ACK_WINDOW, timeout=RPI_TIMEOUT):
+        """
+        Keeps one TCP connection to the RPi open and sends commands over it.
+
+        Up to window commands are sent ahead of the last acknowledged one, instead of waiting for an ack after
+        every command. If the connection drops, it is reopened and every unacknowledged command is sent again; the
+        RPi skips sequence numbers it has already seen.
+        """
+        self.host = host
+        self.port = port
+        self.window = window
+        self.timeout = timeout
+        self.sock = None
+        self.session = int.from_bytes(os.urandom(4), "big")
+        self.next_seq = 0  # Sequence numbers carry on across plans and reconnects.
+
+    def connect(self):
+        """
+        (Re)open the connection, retrying until it succeeds or the timeout passes.
+        """
+        self.close()
+        deadline = time.monotonic() + self.timeout
+        while True:
+            try:
+                self.sock = socket.create_connection((self.host, self.port), timeout=self.timeout)
+                self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+                self.sock.sendall(encode_hello(self.session))
+                print(f"Connected to RPi at {self.host}:{self.port}")
+                return
+            except OSError as e:
+                if time.monotonic() >= deadline:
+                    raise ConnectionError(f"Could not connect to RPi at {self.host}:{self.port}: {e}") from e
+                time.sleep(RPI_RECONNECT_DELAY)
+
+    def close(self):
+        if self.sock is not None:
+            self.sock.close()
+            self.sock = None
+
+    def send_plan(self, messages: List[str]):
+        """
+        Send command messages (see Command.convert_to_message) in order, returning once the RPi received all of them.
+        """
+        if self.sock is None:
+            self.connect()
+
+        pending = [(self.next_seq + i) % SEQ_MODULO for i in range(len(messages))]
+        frames = {seq: encode_command(seq, message) for seq, message in zip(pending, messages)}
+        self.next_seq = (self.next_seq + len(messages)) % SEQ_MODULO
+
+        sent = 0  # Number of pending commands sent since the connection was (re)opened.
+        while pending:
+            try:
+                # Fill the window, then wait for an ack to make room.
+                if sent < min(self.window, len(pending)):
+                    self.sock.sendall(b"".join(frames[seq] for seq in pending[sent:self.window]))
+                    sent = min(self.window, len(pending))
+                payload = recv_frame(self.sock)
+            except OSError as e:
+                print(f"Lost connection to RPi ({e}), reconnecting...")
+                self.connect()
+                sent = 0
+                continue
+
+            if payload[0] != FRAME_ACK:
+                continue
+            _, acked = ACK_PAYLOAD.unpack(payload)
+            while pending and not seq_after(pending[0], acked):
+                pending.pop(0)
+                sent -= 1
+            sent = max(sent, 0)
@@ -0,0 +1,26 @@
+import os
+from functools import lru_cache
+import pygame
+
+
+ASSETS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "Assets")
+
+
+@lru_cache(maxsize=None)
+def get_image(name, size=None, angle=0):
+    """
+    Get the image Assets/<name>, scaled to size (width, height) if given and rotated counter-clockwise by angle degrees.
+
+    Images are only loaded from disk the first time they are asked for, and every variant is shared by the whole
+    process, so nothing is loaded unless something is actually drawn.
+    """
+    if angle:
+        image = pygame.transform.rotate(get_image(name, size), angle)
+    elif size is not None:
+        image = pygame.transform.scale(get_image(name), size)
+    else:
+        image = pygame.image.load(os.path.join(ASSETS_DIR, name))
+    # Converting speeds up blitting, but needs a display.
+    if pygame.display.get_surface() is not None:
+        image = image.convert_alpha()
+    return image
@@ -1,9 +1,4 @@
 import pygame
-from Settings.config import WINDOW_SIZE
-
-
-SCREEN_WIDTH, SCREEN_HEIGHT = WINDOW_SIZE
-screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
 
 # Button class
 class Button():
@@ -15,7 +10,10 @@ class Button():
         self.rect.topleft = (x, y)
         self.clicked = False
 
-    def draw(self):
+    def handle_click(self):
+        """
+        Check the mouse state and return True once per click on this button.
+        """
         action = False
         # Get mouse position
         pos = pygame.mouse.get_pos()
@@ -28,6 +26,9 @@ class Button():
         if pygame.mouse.get_pressed()[0] == 0:
             self.clicked = False
 
+        return action
+
+    def draw(self, screen):
         screen.blit(self.image, (self.rect.x, self.rect.y))
 
-        return action
\ No newline at end of file
+        return self.handle_click()
\ No newline at end of file
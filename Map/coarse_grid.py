@@ -0,0 +1,121 @@
+import heapq
+import math
+from typing import List, Optional, Set, Tuple
+from Map.grid import Grid
+from Map.position import Position
+from Settings.attributes import *
+
+Cell = Tuple[int, int]  # (column, row) of a coarse cell, counted from the bottom left.
+
+# Steps to the 8 neighbouring coarse cells, with their lengths in cells.
+STEPS = [(dx, dy, math.hypot(dx, dy)) for dx in (-1, 0, 1) for dy in (-1, 0, 1) if dx or dy]
+
+
+class Corridor:
+    def __init__(self, coarse_grid, cells: Set[Cell]):
+        """
+        The part of the grid that a path search is limited to, as a set of coarse cells.
+        """
+        self.coarse_grid = coarse_grid
+        self.cells = cells
+
+    def contains(self, x, y):
+        return self.coarse_grid.get_cell(x, y) in self.cells
+
+
+class CoarseGrid:
+    def __init__(self, grid: Grid, block=PATH_COARSE_BLOCK):
+        """
+        The grid at a lower resolution, for finding corridors to plan in on large grids. Each coarse cell covers
+        block by block cells of the grid, and is open if any of those cells is.
+        """
+        self.grid = grid
+        self.cell_length = grid.cell_length * block
+        self.num_cells = math.ceil(grid.num_cells / block)
+        self.open = set()
+        for row in grid.nodes:
+            for node in row:
+                if not node.occupied:
+                    self.open.add(self.get_cell(node.x, node.y))
+        self.component = self.find_components()
+
+    def get_cell(self, x, y) -> Cell:
+        return math.floor(x / self.cell_length), math.floor(y / self.cell_length)
+
+    def find_components(self):
+        """
+        Label the 8-connected groups of open coarse cells.
+        """
+        component = dict()
+        for root in self.open:
+            if root in component:
+                continue
+            component[root] = root
+            pending = [root]
+            while pending:
+                cell = pending.pop()
+                for dx, dy, _ in STEPS:
+                    after = cell[0] + dx, cell[1] + dy
+                    if after in self.open and after not in component:
+                        component[after] = root
+                        pending.append(after)
+        return component
+
+    def state(self, pos: Position) -> Optional[Cell]:
+        """
+        Get the coarse cell the position is in, or None if it is off the grid or blocked. Together with can_reach(),
+        this is a cheaper stand-in for Reachability on large grids: it ignores the robot's heading and only tells
+        apart parts of the arena that are walled off from each other.
+        """
+        node = self.grid.get_coordinate_node(*pos.xy())
+        if node is None or node.occupied:
+            return None
+        return self.get_cell(node.x, node.y)
+
+    def can_reach(self, sources: List[Cell], targets: List[Cell]) -> bool:
+        """
+        Whether any of the target cells is in the same group of open cells as any of the source cells.
+        """
+        return bool({self.component[cell] for cell in sources} & {self.component[cell] for cell in targets})
+
+    def find_corridor(self, start: Position, goals: List[Position], margin=PATH_CORRIDOR_MARGIN) \
+            -> Optional[Corridor]:
+        """
+        Find the shortest 8-connected path of open coarse cells from the start to any of the goals, ignoring the
+        robot's heading. Returns the cells along it, widened by margin cells on every side so that the robot has room
+        to turn, or None if there is no such path.
+        """
+        start_cell = self.get_cell(*start.xy())
+        goal_cells = {self.get_cell(*goal.xy()) for goal in goals}
+        # The ends may be in cells whose centers are blocked.
+        allowed = self.open | goal_cells | {start_cell}
+
+        def heuristic(cell):
+            return min(math.hypot(cell[0] - goal[0], cell[1] - goal[1]) for goal in goal_cells)
+
+        frontier = [(heuristic(start_cell), 0, start_cell)]
+        cost = {start_cell: 0}
+        backtrack = {start_cell: None}
+        while frontier:
+            _, dist, cell = heapq.heappop(frontier)
+            if dist > cost[cell]:
+                continue  # Already reached more cheaply.
+            if cell in goal_cells:
+                break
+            for dx, dy, step in STEPS:
+                after = cell[0] + dx, cell[1] + dy
+                if after not in allowed or dist + step >= cost.get(after, math.inf):
+                    continue
+                cost[after] = dist + step
+                backtrack[after] = cell
+                heapq.heappush(frontier, (dist + step + heuristic(after), dist + step, after))
+        else:
+            return None
+
+        cells = set()
+        while cell is not None:
+            for dx in range(-margin, margin + 1):
+                for dy in range(-margin, margin + 1):
+                    cells.add((cell[0] + dx, cell[1] + dy))
+            cell = backtrack[cell]
+        return Corridor(self, cells)
@@ -0,0 +1,119 @@
+import math
+from abc import ABC, abstractmethod
+
+# Points closer than this to the edge of a box count as outside it, so that rounding errors do not turn a path that
+# only touches a box into one that overlaps it.
+TOLERANCE = 1e-9
+
+
+class Piece(ABC):
+    """
+    Part of the path swept by the robot's center: a curve from parameter start to parameter end.
+
+    Subclasses give the points along the curve, the parameters at which it crosses a vertical or horizontal line, and
+    its bounding box as (left, bottom, right, top).
+    """
+    start = 0
+    end = 1
+    bounds = (0, 0, 0, 0)
+
+    @abstractmethod
+    def point(self, t):
+        pass
+
+    @abstractmethod
+    def crossings_x(self, x):
+        pass
+
+    @abstractmethod
+    def crossings_y(self, y):
+        pass
+
+    def overlaps_box(self, ox, oy, left, bottom, right, top):
+        """
+        Whether any point of this piece, moved by (ox, oy), lies strictly inside the box.
+        """
+        # Move the box rather than the piece, so nothing needs to be allocated in the common case.
+        left, right, bottom, top = left - ox, right - ox, bottom - oy, top - oy
+        b_left, b_bottom, b_right, b_top = self.bounds
+        if b_right <= left or b_left >= right or b_top <= bottom or b_bottom >= top:
+            return False
+
+        # Between two consecutive crossings of the box's edge lines, the piece is either entirely inside the box or
+        # entirely outside it, so checking one point in between is enough.
+        params = {self.start, self.end}
+        for x in (left, right):
+            params.update(self.crossings_x(x))
+        for y in (bottom, top):
+            params.update(self.crossings_y(y))
+        params = sorted(params)
+        for a, b in zip(params, params[1:]):
+            x, y = self.point((a + b) / 2)
+            if left + TOLERANCE < x < right - TOLERANCE and bottom + TOLERANCE < y < top - TOLERANCE:
+                return True
+        return False
+
+
+class Segment(Piece):
+    def __init__(self, x0, y0, x1, y1):
+        """
+        Straight line from (x0, y0) to (x1, y1), with parameter 0 at the start and 1 at the end.
+        """
+        self.x0, self.y0 = x0, y0
+        self.dx, self.dy = x1 - x0, y1 - y0
+        self.bounds = (min(x0, x1), min(y0, y1), max(x0, x1), max(y0, y1))
+
+    def point(self, t):
+        return self.x0 + t * self.dx, self.y0 + t * self.dy
+
+    def crossings_x(self, x):
+        if self.dx == 0:
+            return []
+        t = (x - self.x0) / self.dx
+        return [t] if 0 < t < 1 else []
+
+    def crossings_y(self, y):
+        if self.dy == 0:
+            return []
+        t = (y - self.y0) / self.dy
+        return [t] if 0 < t < 1 else []
+
+
+class Arc(Piece):
+    def __init__(self, cx, cy, a, b, theta0, theta1):
+        """
+        Arc of the axis-aligned ellipse (cx + a sin θ, cy - b cos θ), for θ (in radians) between theta0 and theta1.
+
+        This is how TurnCommand moves the robot: θ is its heading, and a and b are its signed turn radii along x and y.
+        """
+        self.cx, self.cy = cx, cy
+        self.a, self.b = a, b
+        self.start, self.end = min(theta0, theta1), max(theta0, theta1)
+
+        # The extremes are at the ends, or where the ellipse is vertical (x) or horizontal (y).
+        xs = [self.point(t)[0] for t in [self.start, self.end] + self.in_range(math.pi / 2, math.pi)]
+        ys = [self.point(t)[1] for t in [self.start, self.end] + self.in_range(0, math.pi)]
+        self.bounds = (min(xs), min(ys), max(xs), max(ys))
+
+    def point(self, t):
+        return self.cx + self.a * math.sin(t), self.cy - self.b * math.cos(t)
+
+    def in_range(self, t, period=2 * math.pi):
+        """
+        Get every t + k * period strictly between the ends of this arc.
+        """
+        first = math.ceil((self.start - t) / period)
+        last = math.floor((self.end - t) / period)
+        return [t + k * period for k in range(first, last + 1) if self.start < t + k * period < self.end]
+
+    def crossings_x(self, x):
+        if self.a == 0 or abs(v := (x - self.cx) / self.a) > 1:
+            return []
+        base = math.asin(v)
+        return self.in_range(base) + self.in_range(math.pi - base)
+
+    def crossings_y(self, y):
+        if self.b == 0 or abs(v := (self.cy - y) / self.b) > 1:
+            return []
+        base = math.acos(v)
+        return self.in_range(base) + self.in_range(-base)
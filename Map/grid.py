@@ -1,7 +1,7 @@
-import pygame
 import math
 from typing import List
 from collections import deque
+from Map.geometry import TOLERANCE
 from Map.obstacle import Obstacle
 from Map.position import Position
 from Map.node import Node
@@ -10,8 +10,16 @@ from Settings.colors import *
 
 
 class Grid:
-    def __init__(self, obstacles: List[Obstacle]):
-        self.obstacles = obstacles
+    def __init__(self, obstacles: List[Obstacle], length=GRID_LENGTH, cell_length=GRID_CELL_LENGTH):
+        """
+        A square arena of the given (scaled) side length, divided into square cells of cell_length. The defaults are
+        the 200cm by 200cm arena with 10cm cells. The simulator only displays the default arena.
+        """
+        # Our own list, so that changing it never changes the caller's.
+        self.obstacles = list(obstacles)
+        self.length = length
+        self.cell_length = cell_length
+        self.num_cells = int(length // cell_length)  # Number of cells along each side.
         self.nodes = self.generate_nodes()
 
     def generate_nodes(self):
@@ -19,23 +27,23 @@ class Grid:
         Generate the nodes for this grid.
         """
         nodes = deque()
-        for i in range(GRID_NUM_GRIDS):
+        for i in range(self.num_cells):
             row = deque()
-            for j in range(GRID_NUM_GRIDS):
-                x, y = (GRID_CELL_LENGTH / 2 + GRID_CELL_LENGTH * j), \
-                       (GRID_CELL_LENGTH / 2 + GRID_CELL_LENGTH * i)
+            for j in range(self.num_cells):
+                x, y = (self.cell_length / 2 + self.cell_length * j), \
+                       (self.cell_length / 2 + self.cell_length * i)
                 new_node = Node(x, y, not self.check_valid_position(Position(x, y)))
                 row.append(new_node)
             nodes.appendleft(row)
         return nodes
 
     def get_coordinate_node(self, x, y):
-        col_num = math.floor(x / GRID_CELL_LENGTH)
-        row_num = GRID_NUM_GRIDS - math.floor(y / GRID_CELL_LENGTH) - 1
-        try:
-            return self.nodes[row_num][col_num]
-        except IndexError:
+        col_num = math.floor(x / self.cell_length)
+        row_num = self.num_cells - math.floor(y / self.cell_length) - 1
+        # Negative indices would silently wrap around to the other side of the grid.
+        if not (0 <= row_num < self.num_cells and 0 <= col_num < self.num_cells):
             return None
+        return self.nodes[row_num][col_num]
 
     def copy(self):
         """
@@ -47,7 +55,7 @@ class Grid:
             for col in row:
                 new_row.append(col.copy())
             nodes.append(new_row)
-        new_grid = Grid(self.obstacles)
+        new_grid = Grid(self.obstacles, self.length, self.cell_length)
         new_grid.nodes = nodes
         return new_grid
 
@@ -56,23 +64,45 @@ class Grid:
         return self.obstacles
 
     def check_valid_position(self, pos: Position):
+        return self.check_valid_xy(*pos.xy())
+
+    def check_valid_xy(self, x, y):
         # Check if position is inside any obstacle.
-        if any(obstacle.check_within_boundary(*pos.xy()) for obstacle in self.obstacles):
-            return False
+        for obstacle in self.obstacles:
+            if obstacle.check_within_boundary(x, y):
+                return False
 
         # Check if position too close to the border.
         # NOTE: We allow the robot to overextend the border a little!
-        # We do this by setting the limit to be GRID_CELL_LENGTH rather than ROBOT_SAFETY_DISTANCE
-        if (pos.y <= GRID_CELL_LENGTH / 2 or pos.y > GRID_LENGTH) or \
-                (pos.x <= GRID_CELL_LENGTH / 2 or pos.x > GRID_LENGTH):
+        # We do this by setting the limit to be GRID_BORDER_MARGIN rather than ROBOT_SAFETY_DISTANCE
+        if (y <= GRID_BORDER_MARGIN or y > self.length) or \
+                (x <= GRID_BORDER_MARGIN or x > self.length):
             return False
         return True
 
+    def check_valid_move(self, x, y, footprint):
+        """
+        Check whether a motion primitive started at (x, y) keeps the robot valid the whole way, given the primitive's
+        footprint for the robot's heading. This is exact: the swept path is tested against every virtual obstacle
+        and the border, rather than sampled.
+        """
+        for piece in footprint.pieces:
+            # Same limits as check_valid_xy(), allowing for rounding errors.
+            left, bottom, right, top = piece.bounds
+            if x + left <= GRID_BORDER_MARGIN + TOLERANCE or x + right > self.length + TOLERANCE or \
+                    y + bottom <= GRID_BORDER_MARGIN + TOLERANCE or y + top > self.length + TOLERANCE:
+                return False
+            for obstacle in self.obstacles:
+                if piece.overlaps_box(x, y, *obstacle.get_boundary_box()):
+                    return False
+        return True
+
     @classmethod
     def draw_arena_borders(cls, screen):
         """
         Draw the arena borders.
         """
+        import pygame
         # Draw upper border
         pygame.draw.line(screen, BLACK, (0, 0), (GRID_LENGTH, 0))
         # Draw lower border
@@ -1,5 +1,4 @@
 from re import X
-import pygame
 from Map.position import Position
 from Settings.attributes import *
 from Settings.colors import *
@@ -38,12 +37,14 @@ class Node:
         return Node(self.pos.x, self.pos.y, self.occupied, self.pos.direction)
 
     def draw_self(self, screen):
+        import pygame
         if self.occupied:  # If current node is not permissible to the robot
             rect = pygame.Rect(0, 0, GRID_CELL_LENGTH, GRID_CELL_LENGTH)
             rect.center = self.pos.xy_pygame()
             pygame.draw.rect(screen, DARK_GREY , rect)
 
     def draw_boundary(self, screen):
+        import pygame
         x_pygame, y_pygame = self.pos.xy_pygame()
 
         left = x_pygame - GRID_CELL_LENGTH // 2
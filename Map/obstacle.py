@@ -1,4 +1,4 @@
-import pygame
+import math
 from Settings.attributes import *
 from Settings.config import *
 
@@ -22,9 +22,6 @@ class Obstacle:
 
         # Translate given coordinates to be in PyGame coordinates.
         self.pos = Position(x * SCALING_FACTOR, y * SCALING_FACTOR, direction)
-        # Arrow to draw at the target coordinate.
-        self.target_image = pygame.transform.scale(pygame.image.load("Assets/target-arrow.png"),
-                                                   (50, 50))
 
         self.index = index
     def getIndex(self):
@@ -46,6 +43,13 @@ class Obstacle:
             return True
         return False
 
+    def get_boundary_box(self):
+        """
+        Get the (left, bottom, right, top) edges of the virtual obstacle for this image.
+        """
+        return (self.pos.x - OBSTACLE_SAFETY_WIDTH, self.pos.y - OBSTACLE_SAFETY_WIDTH,
+                self.pos.x + OBSTACLE_SAFETY_WIDTH, self.pos.y + OBSTACLE_SAFETY_WIDTH)
+
     def get_boundary_points(self):
         """
         Get points at the corner of the virtual obstacle for this image.
@@ -76,7 +80,30 @@ class Obstacle:
         else:
             return RobotPosition(self.pos.x + OBSTACLE_SAFETY_WIDTH  + ROBOT_LENGTH, self.pos.y, Direction.LEFT)
 
+    def get_robot_target_positions(self, cell_length):
+        """
+        Get every pose the robot may scan the image from, each with its offset from the ideal pose returned by
+        get_robot_target_pos(). The ideal pose comes first, with an offset of 0.
+
+        cell_length -> Cell length of the grid planned on, which OBSTACLE_TARGET_OFFSETS are counted in.
+
+        Poses may be blocked or off the grid; the path finder only ends at those it can reach.
+        """
+        ideal = self.get_robot_target_pos()
+        # Unit vectors pointing away from the image, and to its side.
+        back_x = round(math.cos(math.radians(self.pos.direction.value)))
+        back_y = round(math.sin(math.radians(self.pos.direction.value)))
+        side_x, side_y = -back_y, back_x
+
+        targets = [(ideal, 0)]
+        for sideways, further in OBSTACLE_TARGET_OFFSETS:
+            x = ideal.x + (side_x * sideways + back_x * further) * cell_length
+            y = ideal.y + (side_y * sideways + back_y * further) * cell_length
+            targets.append((RobotPosition(x, y, ideal.direction), math.hypot(sideways, further) * cell_length))
+        return targets
+
     def draw_self(self, screen):
+        import pygame
         # Draw the obstacle onto the grid.
         # We need to translate the obstacle's center into that with respect to PyGame
         # Get the coordinates of the grid's bottom left-hand corner.
@@ -102,6 +129,7 @@ class Obstacle:
         pygame.draw.rect(screen, DARK_YELLOW, rect)
 
     def draw_virtual_boundary(self, screen):
+        import pygame
         # Get the boundary points
         points = self.get_boundary_points()
 
@@ -115,9 +143,9 @@ class Obstacle:
         pygame.draw.line(screen, RED, points[0].xy_pygame(), points[1].xy_pygame())
 
     def draw_robot_target(self, screen):
+        from GUI.assets import get_image
         target = self.get_robot_target_pos()
 
-        rot_image = self.target_image
         angle = 0
         if target.direction == Direction.BOTTOM:
             angle = 180
@@ -126,7 +154,8 @@ class Obstacle:
         elif target.direction == Direction.RIGHT:
             angle = -90
 
-        rot_image = pygame.transform.rotate(rot_image, angle)
+        # Arrow to draw at the target coordinate.
+        rot_image = get_image("target-arrow.png", (50, 50), angle)
         rect = rot_image.get_rect()
         rect.center = target.xy_pygame()
         screen.blit(rot_image, rect)
@@ -50,7 +50,10 @@ class RobotPosition(Position):
     __repr__ = __str__
 
     def copy(self):
-        return RobotPosition(self.x, self.y, self.direction, self.angle)
+        copy = RobotPosition(self.x, self.y, self.direction)
+        # The angle is only a multiple of 90 degrees between turns, so it cannot be derived from the direction.
+        copy.angle = self.angle
+        return copy
 
     def get_pos(self):
         return self.x, self.y, self.direction
\ No newline at end of file
@@ -0,0 +1,45 @@
+import time
+from Settings.attributes import *
+
+
+class PlanningCancelled(Exception):
+    """
+    Raised inside the planner when its Cancellation says to stop.
+    """
+    pass
+
+
+class Cancellation:
+    def __init__(self, deadline=None, event=None, poll_interval=PATH_CANCEL_POLL_INTERVAL):
+        """
+        Tells a planner to stop early, see PlannerConfig. The planner calls check() often, and it raises
+        PlanningCancelled once the deadline has passed or the event is set.
+
+        deadline -> time.time() after which to stop, or None.
+        event -> Anything with is_set(), such as a threading.Event, or a multiprocessing Manager's Event to cancel a
+                 planner in another process. It is only looked at every poll_interval seconds, as asking another
+                 process is slow.
+
+        Can be pickled along with the event, so planners in worker processes can be given one.
+        """
+        self.deadline = deadline
+        self.event = event
+        self.poll_interval = poll_interval
+        self._next_poll = 0
+
+    @classmethod
+    def after(cls, seconds, event=None):
+        return cls(time.time() + seconds if seconds is not None else None, event)
+
+    def cancel(self):
+        self.event.set()
+
+    def check(self):
+        now = time.time()
+        if now < self._next_poll:
+            return
+        self._next_poll = now + self.poll_interval
+        if self.deadline is not None and now > self.deadline:
+            raise PlanningCancelled("deadline passed")
+        if self.event is not None and self.event.is_set():
+            raise PlanningCancelled("cancelled")
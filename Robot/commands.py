@@ -1,8 +1,18 @@
+import copy
 import math
 from abc import ABC, abstractmethod
+from functools import lru_cache
 from Settings.config import *
 from Settings.attributes import *
 from Map.position import *
+from Map.geometry import Arc, Segment
+
+
+def mission_time(commands):
+    """
+    Time in seconds that the robot needs to carry out the given commands.
+    """
+    return sum(command.time for command in commands)
 
 
 class Command(ABC):
@@ -14,6 +24,14 @@ class Command(ABC):
     def tick(self):
         self.ticks -= 1
 
+    def copy(self):
+        """
+        Get a copy of this command that has not been carried out yet.
+        """
+        command = copy.copy(self)
+        command.ticks = command.total_ticks
+        return command
+
     @abstractmethod
     def process_one_tick(self, robot):
         """
@@ -153,20 +171,7 @@ class TurnCommand(Command):
         assert isinstance(curr_pos, RobotPosition), print("Cannot apply turn command on non-robot positions!")
 
         # Get change in (x, y) coordinate.
-        if curr_pos.direction == Direction.RIGHT or curr_pos.direction == Direction.LEFT:
-            if not self.rev:
-                ROBOT_TURN_RADIUS_X = ROBOT_TURN_RADIUS
-                ROBOT_TURN_RADIUS_Y = ROBOT_TURN_RADIUS_DRIFT
-            else:
-                ROBOT_TURN_RADIUS_X = ROBOT_TURN_RADIUS_DRIFT
-                ROBOT_TURN_RADIUS_Y = ROBOT_TURN_RADIUS
-        else:
-            if not self.rev:
-                ROBOT_TURN_RADIUS_X = ROBOT_TURN_RADIUS_DRIFT
-                ROBOT_TURN_RADIUS_Y = ROBOT_TURN_RADIUS
-            else:
-                ROBOT_TURN_RADIUS_X = ROBOT_TURN_RADIUS
-                ROBOT_TURN_RADIUS_Y = ROBOT_TURN_RADIUS_DRIFT
+        ROBOT_TURN_RADIUS_X, ROBOT_TURN_RADIUS_Y = self.get_radii(curr_pos.direction)
 
         x_change = ROBOT_TURN_RADIUS_X * (math.sin(math.radians(curr_pos.angle + self.angle)) -
                                                 math.sin(math.radians(curr_pos.angle)))
@@ -201,16 +206,161 @@ class TurnCommand(Command):
             curr_pos.direction = Direction.LEFT
         return self
 
+    def get_radii(self, direction: Direction):
+        """
+        Get the turn radii along x and y when starting the turn in the given direction. The drift radius is along
+        the robot's starting heading when going forward, and across it when reversing.
+        """
+        if direction == Direction.RIGHT or direction == Direction.LEFT:
+            if not self.rev:
+                return ROBOT_TURN_RADIUS, ROBOT_TURN_RADIUS_DRIFT
+            return ROBOT_TURN_RADIUS_DRIFT, ROBOT_TURN_RADIUS
+        if not self.rev:
+            return ROBOT_TURN_RADIUS_DRIFT, ROBOT_TURN_RADIUS
+        return ROBOT_TURN_RADIUS, ROBOT_TURN_RADIUS_DRIFT
+
+    def get_arc(self, curr_pos: RobotPosition) -> Arc:
+        """
+        Get the exact path that apply_on_pos() moves the robot's center along, from the given position.
+        """
+        radius_x, radius_y = self.get_radii(curr_pos.direction)
+        # apply_on_pos() adds R(sin θ - sin θ0) to x and subtracts R(cos θ - cos θ0) from y, or the other way round.
+        sign = 1 if (self.angle < 0 and self.rev) or (self.angle >= 0 and not self.rev) else -1
+        a, b = sign * radius_x, sign * radius_y
+        theta0 = math.radians(curr_pos.angle)
+        return Arc(curr_pos.x - a * math.sin(theta0), curr_pos.y + b * math.cos(theta0), a, b,
+                   theta0, theta0 + math.radians(self.angle))
+
     def convert_to_message(self):
+        angle = round(abs(self.angle))
         if self.angle > 0 and not self.rev:
             # This is going forward left.
-            return "LF090"
+            return f"LF{angle:03}"
         elif self.angle > 0 and self.rev:
             # This is going backward right.
-            return "RB090"
+            return f"RB{angle:03}"
         elif self.angle < 0 and not self.rev:
             # This is going forward right.
-            return "RF090"
+            return f"RF{angle:03}"
         else:
             # This is going backward left.
-            return "LB090"
+            return f"LB{angle:03}"
+
+
+def command_from_message(message: str) -> Command:
+    """
+    Rebuild a command from its message, see Command.convert_to_message(). Scans take ROBOT_SCAN_TIME.
+    """
+    prefix, value = message[:2], int(message[2:].lstrip("_") or 0)
+    if prefix == "P_":
+        return ScanCommand(ROBOT_SCAN_TIME, value)
+    if prefix == "SF":
+        return StraightCommand(value * SCALING_FACTOR)
+    if prefix == "SB":
+        return StraightCommand(-value * SCALING_FACTOR)
+    # Turns to the left while going forward, or to the right while reversing, are counter-clockwise.
+    angle = value if prefix in ("LF", "RB") else -value
+    return TurnCommand(angle, prefix[1] == "B")
+
+
+class Footprint:
+    def __init__(self, pieces, end: RobotPosition):
+        """
+        What a motion primitive does when started at (0, 0) with some heading.
+
+        pieces -> The exact path of the robot's center, as Segment and Arc pieces, one per command.
+        end -> The final position, whose angle is the change in angle.
+        """
+        self.pieces = pieces
+        self.dx, self.dy = end.x, end.y
+        self.direction = end.direction
+        self.d_angle = end.angle
+
+
+class MotionPrimitive:
+    def __init__(self, name, specs):
+        """
+        A move that the path finder can make in one step: one or more commands carried out back to back.
+
+        specs -> The commands, as ("straight", dist) or ("turn", angle, rev) tuples.
+
+        Commands keep track of their own execution, so a fresh set is made for every use. Everything that does not
+        depend on where the robot is (swept footprint for every heading, time needed) is computed only once.
+        """
+        self.name = name
+        self.specs = specs
+        self.time = mission_time(self.make_commands())
+        self.footprints = {direction: self.compute_footprint(direction) for direction in Direction}
+
+    def __str__(self):
+        return f"MotionPrimitive({self.name})"
+
+    __repr__ = __str__
+
+    def make_commands(self):
+        commands = []
+        for kind, *args in self.specs:
+            commands.append(StraightCommand(*args) if kind == "straight" else TurnCommand(*args))
+        return commands
+
+    def compute_footprint(self, direction: Direction) -> Footprint:
+        end = RobotPosition(0, 0, direction)
+        pieces = []
+        for command in self.make_commands():
+            start = end.copy()
+            if isinstance(command, TurnCommand):
+                pieces.append(command.get_arc(start))
+            command.apply_on_pos(end)
+            if isinstance(command, StraightCommand):
+                pieces.append(Segment(start.x, start.y, end.x, end.y))
+        end.angle -= direction.value
+        return Footprint(pieces, end)
+
+
+def straights(cell_length, *cells):
+    return [MotionPrimitive(f"straight {sign * n * cell_length / SCALING_FACTOR:g}cm",
+                            [("straight", sign * n * cell_length)])
+            for n in cells for sign in (1, -1)]
+
+
+# Primitives that the path finder may use, by group. Pick the groups to use with PATH_PRIMITIVES. Each group is made
+# for a grid cell length, as straights move whole cells.
+PRIMITIVE_GROUPS = {
+    "straight": lambda cell_length: straights(cell_length, 1),
+    # Longer straights let the search cross open space in fewer steps.
+    "long_straight": lambda cell_length: straights(cell_length, 2, 4),
+    "turn90": lambda cell_length: [
+        MotionPrimitive("forward left 90", [("turn", 90, False)]),
+        MotionPrimitive("forward right 90", [("turn", -90, False)]),
+        MotionPrimitive("reverse right 90", [("turn", 90, True)]),
+        MotionPrimitive("reverse left 90", [("turn", -90, True)]),
+    ],
+    # Turn around on the spot: two 90 degree turns and a straight back to where the robot started.
+    "three_point": lambda cell_length: [
+        MotionPrimitive("three point turn, forward left",
+                        [("turn", 90, False), ("turn", 90, True), ("straight", 2 * ROBOT_TURN_RADIUS)]),
+        MotionPrimitive("three point turn, forward right",
+                        [("turn", -90, False), ("turn", -90, True), ("straight", 2 * ROBOT_TURN_RADIUS)]),
+        MotionPrimitive("three point turn, reverse right",
+                        [("turn", 90, True), ("turn", 90, False), ("straight", -2 * ROBOT_TURN_RADIUS)]),
+        MotionPrimitive("three point turn, reverse left",
+                        [("turn", -90, True), ("turn", -90, False), ("straight", -2 * ROBOT_TURN_RADIUS)]),
+    ],
+    # Shift sideways with two opposite 45 degree arcs. These end between grid cell centers, so the robot may stop a
+    # few centimeters away from the exact target position.
+    "lane_change": lambda cell_length: [
+        MotionPrimitive("lane change, forward left", [("turn", 45, False), ("turn", -45, False)]),
+        MotionPrimitive("lane change, forward right", [("turn", -45, False), ("turn", 45, False)]),
+        MotionPrimitive("lane change, reverse right", [("turn", 45, True), ("turn", -45, True)]),
+        MotionPrimitive("lane change, reverse left", [("turn", -45, True), ("turn", 45, True)]),
+    ],
+}
+
+
+@lru_cache(maxsize=None)
+def get_primitives(groups=PATH_PRIMITIVES, cell_length=GRID_CELL_LENGTH):
+    """
+    Get the motion primitives in the given groups, for a grid with the given cell length. They are built on first use
+    and shared afterwards.
+    """
+    return tuple(primitive for group in groups for primitive in PRIMITIVE_GROUPS[group](cell_length))
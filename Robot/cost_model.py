@@ -0,0 +1,91 @@
+import math
+from abc import ABC, abstractmethod
+from Settings.attributes import *
+from Robot.commands import *
+
+
+class CostModel(ABC):
+    """
+    What the planner minimises. A*, the ordering of obstacles and the choice between retries all use the same model.
+    """
+    @abstractmethod
+    def command_cost(self, command: Command) -> float:
+        pass
+
+    @abstractmethod
+    def distance_cost(self, dist) -> float:
+        """
+        Lower bound on the cost of getting somewhere that is the given (scaled) straight-line distance away.
+        """
+        pass
+
+    @abstractmethod
+    def tour_cost(self, start: RobotPosition, obstacles) -> float:
+        """
+        Cheap estimate of the cost of visiting the obstacles in the given order, used to rank orderings.
+        """
+        pass
+
+    def commands_cost(self, commands) -> float:
+        return sum(self.command_cost(command) for command in commands)
+
+
+class TimeCostModel(CostModel):
+    """
+    Minimise the time, in seconds, that the robot needs to finish the course.
+    """
+    def command_cost(self, command):
+        return command.time
+
+    def distance_cost(self, dist):
+        return dist / ROBOT_SPEED_PER_SECOND
+
+    def tour_cost(self, start, obstacles):
+        cost = 0
+        curr = start
+        for obstacle in obstacles:
+            target = obstacle.get_robot_target_pos()
+            dist = math.hypot(target.x - curr.x, target.y - curr.y)
+            # Changing heading by ∆θ means driving at least an arc of length R∆θ. That arc also covers distance, so
+            # only the larger of the two is a lower bound.
+            d_angle = abs((target.angle - curr.angle + 180) % 360 - 180)
+            cost += max(dist, math.radians(d_angle) * ROBOT_TURN_RADIUS) / ROBOT_SPEED_PER_SECOND + ROBOT_SCAN_TIME
+            curr = target
+        return cost
+
+
+class LegacyCostModel(CostModel):
+    """
+    The original model: a straight costs its length and every turn PATH_TURN_COST, so the fewest turns win.
+    Obstacles are ordered by the distance between their centers.
+    """
+    def command_cost(self, command):
+        if isinstance(command, TurnCommand):
+            return PATH_TURN_COST
+        if isinstance(command, StraightCommand):
+            return abs(command.dist)
+        return 0
+
+    def distance_cost(self, dist):
+        return dist
+
+    def tour_cost(self, start, obstacles):
+        targets = [start.xy_pygame()]
+        for obstacle in obstacles:
+            targets.append(obstacle.pos.xy_pygame())
+
+        dist = 0
+        for i in range(len(targets) - 1):
+            dist += math.sqrt(((targets[i][0] - targets[i + 1][0]) ** 2) +
+                              ((targets[i][1] - targets[i + 1][1]) ** 2))
+        return dist
+
+
+COST_MODELS = {
+    "time": TimeCostModel,
+    "legacy": LegacyCostModel,
+}
+
+
+def get_cost_model(name=PATH_COST_MODEL) -> CostModel:
+    return COST_MODELS[name]()
@@ -0,0 +1,174 @@
+import hashlib
+import heapq
+import math
+import mmap
+import os
+import sys
+import tempfile
+import time
+from array import array
+from functools import lru_cache
+from Settings.attributes import *
+from Robot.commands import get_primitives
+
+# Bump when the table layout or how it is computed changes, so that old files are not used.
+TABLE_VERSION = 1
+MAGIC = b"ALGOCTG%d" % TABLE_VERSION
+
+DIRECTIONS = list(Direction)
+DIRECTION_INDEX = {direction: i for i, direction in enumerate(DIRECTIONS)}
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class CostToGo:
+    def __init__(self, values, window):
+        """
+        Lower bounds on the cost of getting from a grid cell and heading to a goal cell and heading, when there are
+        no obstacles. Only depends on the motion primitives and their costs, so it is computed once and stored, see
+        get_cost_to_go().
+
+        values -> The table, laid out as [goal direction][dx][dy][direction], where dx, dy are the offsets in cells
+                  from the goal, from -window to window.
+        """
+        self.values = values
+        self.window = window
+        self.size = 2 * window + 1
+
+    def index(self, dx, dy, direction: Direction, goal_direction: Direction):
+        return (((DIRECTION_INDEX[goal_direction] * self.size + dx + self.window) * self.size + dy + self.window) * 4
+                + DIRECTION_INDEX[direction])
+
+    def cost(self, dx, dy, direction: Direction, goal_direction: Direction):
+        """
+        Cost from dx, dy cells away from the goal, which must both be within the window.
+        """
+        return self.values[self.index(dx, dy, direction, goal_direction)]
+
+
+def landing_offsets(d):
+    """
+    Cell offsets that a move of d cells can end at, from anywhere inside a cell.
+    """
+    d = round(d, 6)  # Moves that should be whole cells may be a little off.
+    return {math.floor(d), math.ceil(d)}
+
+
+def compute_table(primitives, costs, cell_length, window):
+    """
+    Run Dijkstra backwards from every goal heading over the relaxed grid in which a primitive can end at any cell
+    that it could from some point inside the cell it starts in. Positions are only known to the cell in A*, so this
+    keeps the table a lower bound.
+    """
+    size = 2 * window + 1
+    # How each (cell offset, heading) can be reached: predecessors[heading after] = [(dx, dy, heading before, cost)].
+    predecessors = [[] for _ in DIRECTIONS]
+    for primitive, cost in zip(primitives, costs):
+        for direction, footprint in primitive.footprints.items():
+            for dx in landing_offsets(footprint.dx / cell_length):
+                for dy in landing_offsets(footprint.dy / cell_length):
+                    predecessors[DIRECTION_INDEX[footprint.direction]].append(
+                        (dx, dy, DIRECTION_INDEX[direction], cost))
+
+    values = array("d", [math.inf]) * (4 * size * size * 4)
+    for goal in range(4):
+        base = goal * size * size * 4
+        start = ((window * size) + window) * 4 + goal
+        values[base + start] = 0
+        frontier = [(0, window, window, goal)]
+        while frontier:
+            cost, x, y, heading = heapq.heappop(frontier)
+            if cost > values[base + (x * size + y) * 4 + heading]:
+                continue
+            for dx, dy, before, step in predecessors[heading]:
+                px, py = x - dx, y - dy
+                if not (0 <= px < size and 0 <= py < size):
+                    continue
+                i = base + (px * size + py) * 4 + before
+                if cost + step < values[i]:
+                    values[i] = cost + step
+                    heapq.heappush(frontier, (cost + step, px, py, before))
+    return values
+
+
+def table_key(primitives, costs, cell_length, window):
+    """
+    Hash of everything the table is computed from, so that changing any robot or arena setting gives a new file.
+    """
+    moves = [(primitive.name, direction.value, round(footprint.dx, 6), round(footprint.dy, 6),
+              footprint.direction.value, round(cost, 9))
+             for primitive, cost in zip(primitives, costs)
+             for direction, footprint in primitive.footprints.items()]
+    return hashlib.sha256(repr((TABLE_VERSION, moves, cell_length, window)).encode()).hexdigest()[:16]
+
+
+def table_path(primitives, costs, cell_length, window, table_dir=PATH_TABLE_DIR):
+    return os.path.join(ROOT, table_dir, f"cost_to_go-{table_key(primitives, costs, cell_length, window)}.bin")
+
+
+def load_table(path):
+    """
+    Memory-map a stored table read-only, so that every process using it shares the same pages.
+    """
+    with open(path, "rb") as file:
+        data = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+    if data[:len(MAGIC)] != MAGIC:
+        data.close()
+        raise ValueError(f"{path} is not a cost-to-go table")
+    return memoryview(data)[len(MAGIC):].cast("d")
+
+
+def store_table(path, values):
+    """
+    Write a table so that other processes never see it half written.
+    """
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path))
+    try:
+        with os.fdopen(fd, "wb") as file:
+            file.write(MAGIC)
+            values.tofile(file)
+        os.chmod(tmp, 0o644)  # mkstemp() makes files only their owner can read.
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+
+@lru_cache(maxsize=None)
+def get_cost_to_go(primitives, costs, cell_length, window=PATH_COST_TO_GO_WINDOW, table_dir=PATH_TABLE_DIR) \
+        -> CostToGo:
+    """
+    Get the table for the given primitives and their costs, from table_dir if it was stored before, and computing and
+    storing it there otherwise. Each process only loads a table once.
+    """
+    path = table_path(primitives, costs, cell_length, window, table_dir)
+    try:
+        return CostToGo(load_table(path), window)
+    except (OSError, ValueError):
+        pass
+    values = compute_table(primitives, costs, cell_length, window)
+    try:
+        store_table(path, values)
+    except OSError:
+        pass  # Read-only installs just compute the table in every process.
+    return CostToGo(values, window)
+
+
+def main():
+    """
+    Build the table for the default settings, so that planners start without computing it.
+    """
+    from Robot.cost_model import get_cost_model
+    cost_model = get_cost_model(PATH_COST_MODEL)
+    primitives = get_primitives(PATH_PRIMITIVES, GRID_CELL_LENGTH)
+    costs = tuple(cost_model.commands_cost(primitive.make_commands()) for primitive in primitives)
+    start = time.perf_counter()
+    values = compute_table(primitives, costs, GRID_CELL_LENGTH, PATH_COST_TO_GO_WINDOW)
+    path = table_path(primitives, costs, GRID_CELL_LENGTH, PATH_COST_TO_GO_WINDOW)
+    store_table(path, values)
+    print(f"Computed in {time.perf_counter() - start:.2f}s, written to {path}")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
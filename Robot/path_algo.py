@@ -5,105 +5,133 @@ from Settings.attributes import *
 from Settings.config import *
 from Map.position import RobotPosition
 from Map.grid import Grid
+from Map.coarse_grid import Corridor
 from Map.node import Node
 from Robot.commands import *
 
 
 class ModifiedAStar:
-    def __init__(self, grid, brain, start: RobotPosition, end: RobotPosition):
-        # We use a copy of the grid rather than use a reference
-        # to the exact grid.
-        self.grid: Grid = grid.copy()
+    def __init__(self, grid, brain, start: RobotPosition, goals: List[Tuple[RobotPosition, float]],
+                 corridor: Corridor = None):
+        """
+        Find the cheapest path from start to any of the goals, given as (position, penalty) pairs. Reaching a goal
+        costs its penalty on top of the path itself.
+
+        If a corridor is given, moves may only end inside it.
+        """
+        # The search never changes the grid, so it is shared rather than copied.
+        self.grid: Grid = grid
+        self.corridor = corridor
         self.brain = brain
+        self.cost_model = brain.cost_model
+        self.trace = brain.trace
+        self.cancel = brain.cancel
+        self.primitives = brain.primitives
+        self.primitive_costs = brain.primitive_costs
+        self.cost_to_go = brain.cost_to_go
         self.total_cost = 0
+        self.expansions = 0  # Number of states expanded by start_astar().
 
         self.start = start
-        self.end = end
+        self.goals = goals
+        # The cells of the goals on the grid, with their directions and penalties, for looking up self.cost_to_go.
+        cell_length = grid.cell_length
+        self.goal_cells = [(math.floor(end.x / cell_length), math.floor(end.y / cell_length), end.direction, penalty)
+                           for end, penalty in goals if grid.get_coordinate_node(*end.xy()) is not None]
+        # Primitives and commands along the path found, filled in by start_astar().
+        self.path = []
+        self.commands = []
 
     def getTotalCost(self):
         return self.total_cost
 
-    def get_neighbours(self, pos: RobotPosition) -> List[Tuple[Node, RobotPosition, int, Command]]:
+    def get_neighbours(self, pos: RobotPosition) -> List[Tuple[Node, RobotPosition, float, MotionPrimitive]]:
+        # Straight runs are deliberately not jumped over, as in jump point search. On this lattice a turn started from
+        # any cell of a run ends where no other path gets as cheaply, so skipping the cells in between loses optimal
+        # paths. Expanding a run's cells right away while their priority does not grow keeps the search optimal, but
+        # saved under 10% of the frontier pushes, since the cost-to-go heuristic already keeps the search narrow.
         neighbours = []
 
-        # Check travel straights.
-        straight_dist = 10 * SCALING_FACTOR
-        straight_commands = [
-            StraightCommand(straight_dist),
-            StraightCommand(-straight_dist)
-        ]
-        for c in straight_commands:
-            # Check if doing this command does not bring us to any invalid position.
-            after, p = self.check_valid_command(c, pos)
-            if after:
-                neighbours.append((after, p, straight_dist, c))
-
-        # Check turns
-        turn_penalty = PATH_TURN_COST
-        turn_commands = [
-            TurnCommand(90, False),  # Forward right turn
-            TurnCommand(-90, False),  # Forward left turn
-            TurnCommand(90, True),  # Reverse with wheels to right.
-            TurnCommand(-90, True),  # Reverse with wheels to left.
-        ]
-        for c in turn_commands:
-            # Check if doing this command does not bring us to any invalid position.
-            after, p = self.check_valid_command(c, pos)
+        for primitive, cost in zip(self.primitives, self.primitive_costs):
+            # Check if doing this primitive does not bring us to, or through, any invalid position.
+            after, p = self.check_valid_primitive(primitive, pos)
             if after:
-                neighbours.append((after, p, turn_penalty, c))
+                neighbours.append((after, p, cost, primitive))
 
         return neighbours
 
-    def check_valid_command(self, command: Command, p: RobotPosition):
-        p = p.copy()
-        if isinstance(command, TurnCommand):
-            p_c = p.copy()
-            for tick in range(command.ticks // PATH_TURN_CHECK_GRANULARITY):
-                tick_command = TurnCommand(command.angle / (command.ticks // PATH_TURN_CHECK_GRANULARITY),
-                                           command.rev)
-                tick_command.apply_on_pos(p_c)
-                if not (self.grid.check_valid_position(p_c) and self.grid.get_coordinate_node(*p_c.xy())):
-                    return None, None
-        command.apply_on_pos(p)
-        if self.grid.check_valid_position(p) and (after := self.grid.get_coordinate_node(*p.xy())):
-            after.pos.direction = p.direction
-            return after.copy(), p
+    def check_valid_primitive(self, primitive: MotionPrimitive, p: RobotPosition):
+        footprint = primitive.footprints[p.direction]
+        if self.corridor and not self.corridor.contains(p.x + footprint.dx, p.y + footprint.dy):
+            return None, None
+        if not self.grid.check_valid_move(p.x, p.y, footprint):
+            return None, None
+        p = RobotPosition(p.x + footprint.dx, p.y + footprint.dy, footprint.direction)
+        if after := self.grid.get_coordinate_node(*p.xy()):
+            return Node(after.x, after.y, after.occupied, p.direction), p
         return None, None
 
     def heuristic(self, curr_pos: RobotPosition):
-        dx = abs(curr_pos.x - self.end.x)
-        dy = abs(curr_pos.y - self.end.y)
-        return math.sqrt(dx ** 2 + dy ** 2)
+        # The cheapest goal, counting its penalty, is a lower bound over all of them.
+        if self.cost_to_go is not None:
+            x = math.floor(curr_pos.x / self.grid.cell_length)
+            y = math.floor(curr_pos.y / self.grid.cell_length)
+            return min((self.cost_to_go.cost(x - goal_x, y - goal_y, curr_pos.direction, direction) + penalty
+                        for goal_x, goal_y, direction, penalty in self.goal_cells), default=math.inf)
+        return min(self.cost_model.distance_cost(math.hypot(curr_pos.x - end.x, curr_pos.y - end.y)) + penalty
+                   for end, penalty in self.goals)
 
     def start_astar(self):
         frontier = PriorityQueue()
         backtrack = dict()
         cost = dict()
 
-        # We can check what the goal node is
-        goal_node = self.grid.get_coordinate_node(*self.end.xy()).copy()  # Take note of copy!
-        goal_node.pos.direction = self.end.direction  # Set the required direction at this node.
+        # We can check what the goal nodes are, and the penalty for ending at each.
+        goal_penalties = dict()
+        for end, penalty in self.goals:
+            goal_node = self.grid.get_coordinate_node(*end.xy())
+            if goal_node is None or goal_node.occupied:
+                continue  # Off the grid or blocked, so never reachable.
+            goal_node = goal_node.copy()  # Take note of copy!
+            goal_node.pos.direction = end.direction  # Set the required direction at this node.
+            goal_penalties[goal_node] = min(penalty, goal_penalties.get(goal_node, math.inf))
+        if not goal_penalties:
+            return None
+
         # Add starting node set into the frontier.
         start_node: Node = self.grid.get_coordinate_node(*self.start.xy()).copy()  # Take note of copy!
-        start_node.direction = self.start.direction  # Make the node know which direction the robot is facing.
+        start_node.pos.direction = self.start.direction  # Make the node know which direction the robot is facing.
         offset = 0  # Used to tie-break.
-        frontier.put((0, offset, (start_node, self.start)))  # Extra time parameter to tie-break same priority.
+        # Extra time parameter to tie-break same priority. The last element marks entries that finish the search.
+        frontier.put((0, offset, (start_node, self.start, False)))
         cost[start_node] = 0
         # Having None as the parent means this key is the starting node.
         backtrack[start_node] = (None, None)  # Parent, Command
 
         while not frontier.empty():  # While there are still nodes to process.
             # Get the highest priority node.
-            priority, _, (current_node, current_position) = frontier.get()
-
-            # If the current node is our goal.
-            if current_node == goal_node:
+            priority, _, (current_node, current_position, finish) = frontier.get()
+            if self.cancel is not None:
+                self.cancel.check()
+            self.expansions += not finish
+            if self.trace is not None and not finish:
+                self.trace.expand(current_position, cost[current_node], self.heuristic(current_position),
+                                  backtrack[current_node][0])
+
+            # If ending at the current goal is cheaper than anything left, we are done.
+            if finish:
                 # Get the commands needed to get to destination.
-                self.extract_commands(backtrack, goal_node)
-                self.total_cost=cost[goal_node]
+                self.extract_commands(backtrack, current_node)
+                self.total_cost = priority
                 return current_position
 
-            for new_node, new_pos, weight, c in self.get_neighbours(current_position):
+            # Ending here is only as good as its penalty allows, so queue that as its own entry rather than stopping.
+            if current_node in goal_penalties:
+                offset += 1
+                frontier.put((cost[current_node] + goal_penalties[current_node], offset,
+                              (current_node, current_position, True)))
+
+            for new_node, new_pos, weight, primitive in self.get_neighbours(current_position):
 
                 new_cost = cost.get(current_node) + weight
 
@@ -111,20 +139,22 @@ class ModifiedAStar:
                     offset += 1
                     priority = new_cost + self.heuristic(new_pos)
 
-                    frontier.put((priority, offset, (new_node, new_pos)))
-                    backtrack[new_node] = (current_node, c)
+                    frontier.put((priority, offset, (new_node, new_pos, False)))
+                    backtrack[new_node] = (current_node, primitive)
                     cost[new_node] = new_cost
         return None
 
     def extract_commands(self, backtrack, goal_node):
         """
-        Extract required commands to get to destination.
+        Extract required commands to get to destination into self.commands.
         """
-        commands = []
+        primitives = []
         curr = goal_node
         while curr:
-            curr, c = backtrack.get(curr, (None, None))
-            if c:
-                commands.append(c)
-        commands.reverse()
-        self.brain.commands.extend(commands)
\ No newline at end of file
+            curr, primitive = backtrack.get(curr, (None, None))
+            if primitive:
+                primitives.append(primitive)
+        primitives.reverse()
+        self.path = primitives
+        for primitive in primitives:
+            self.commands.extend(primitive.make_commands())
\ No newline at end of file
@@ -1,18 +1,77 @@
 import itertools
+import logging
 import math
-import sys
 from collections import deque
 from typing import Tuple
+from Map.coarse_grid import CoarseGrid
 from Map.obstacle import Obstacle
 from Robot.commands import *
 from Settings.attributes import *
+from Robot.cost_model import CostModel, get_cost_model
+from Robot.cost_to_go import get_cost_to_go
 from Robot.path_algo import ModifiedAStar
+from Robot.reachability import Reachability
+from Robot.segment_cache import SegmentCache, shared_segment_cache
+from Robot.cancellation import Cancellation
+
+logger = logging.getLogger(__name__)
+
+
+class PlannerConfig:
+    def __init__(self, cost_model=PATH_COST_MODEL, primitives=PATH_PRIMITIVES, grid_length=GRID_LENGTH,
+                 cell_length=GRID_CELL_LENGTH, max_retry=MAX_RETRY, log: logging.Logger = None, trace=None,
+                 segment_cache: SegmentCache = shared_segment_cache, cancel: Cancellation = None):
+        """
+        Settings for one planning run. Defaults come from Settings/attributes.py.
+
+        cost_model -> Name of the cost model to minimise, see Robot/cost_model.py.
+        primitives -> Names of the motion primitive groups to use, see Robot/commands.py.
+        grid_length, cell_length -> Size of the arena and of its cells, scaled.
+        max_retry -> Most obstacle orderings to try.
+        log -> Where the planner narrates what it does. Defaults to this module's logger.
+        trace -> If given, a TraceRecorder (see Robot/trace.py) that every search step is recorded into.
+        segment_cache -> Where legs are reused from and kept for later plans. Defaults to one shared by the whole
+                         process; None plans every leg from scratch.
+        cancel -> If given, planning stops with PlanningCancelled when it says so.
+        """
+        self.cost_model = cost_model
+        self.primitives = tuple(primitives)
+        self.grid_length = grid_length
+        self.cell_length = cell_length
+        self.max_retry = max_retry
+        self.log = log or logger
+        self.trace = trace
+        self.segment_cache = segment_cache
+        self.cancel = cancel
 
 
 class Brain:
-    def __init__(self, robot, grid):
+    def __init__(self, robot, grid, cost_model: CostModel = None, config: PlannerConfig = None):
+        """
+        Plans the path for a robot on a grid. Nothing shared with other brains is changed while planning, so several
+        brains may plan at once on different threads.
+
+        robot is only used for its position when plan_path() is not given a start, and may be None otherwise.
+        """
         self.robot = robot
         self.grid = grid
+        self.config = config or PlannerConfig()
+        self.log = self.config.log
+        self.trace = self.config.trace
+        self.segment_cache = self.config.segment_cache
+        self.cancel = self.config.cancel
+        # What the planner minimises, everywhere: A* legs, obstacle ordering and picking the best retry.
+        self.cost_model = cost_model or get_cost_model(self.config.cost_model)
+        # Moves the path finder can choose from.
+        self.primitives = get_primitives(self.config.primitives, grid.cell_length)
+        self.primitive_costs = tuple(self.cost_model.commands_cost(primitive.make_commands())
+                                     for primitive in self.primitives)
+        # What A* steers by: the cost of getting to the goal if there were no obstacles, precomputed for grids it
+        # covers.
+        self.cost_to_go = get_cost_to_go(self.primitives, self.primitive_costs, grid.cell_length) \
+            if grid.num_cells - 1 <= PATH_COST_TO_GO_WINDOW else None
+        # Large grids are planned coarse-to-fine.
+        self.coarse_grid = CoarseGrid(grid) if grid.num_cells >= PATH_HIERARCHICAL_MIN_CELLS else None
 
         # Compute the simple Hamiltonian path for all obstacles
         self.simple_hamiltonian = tuple()
@@ -20,29 +79,67 @@ class Brain:
         # Create all the commands required to finish the course.
         self.commands = deque()
 
+        # Why each obstacle that cannot be visited at all is skipped, by obstacle index.
+        self.unreachable = dict()
+        # Whether the last plan visits every reachable obstacle.
+        self.complete = False
+        # Number of states the path finder expanded for the last plan, over all attempts.
+        self.expansions = 0
+
+
+    def check_reachability(self, start):
+        """
+        Work out, before searching for any path, which obstacles can be visited at all and which cannot be visited
+        straight after which. The reason each unreachable obstacle is skipped is stored in self.unreachable.
+
+        Returns the reachable obstacles, and the (obstacle, next obstacle) pairs that cannot follow each other.
+        """
+        # The full analysis grows with the area of the grid, so large grids only get the coarse one.
+        reachability = self.coarse_grid or Reachability(self.grid, self.primitives)
+        start_state = reachability.state(start)
 
-    def compute_simple_hamiltonian_path(self) -> Tuple[Obstacle]:
+        self.unreachable = dict()
+        goal_states = dict()
+        for obstacle in self.grid.obstacles:
+            targets = obstacle.get_robot_target_positions(self.grid.cell_length)
+            states = [state for state in (reachability.state(pos) for pos, _ in targets) if state is not None]
+            if not states:
+                self.unreachable[obstacle.index] = "every scan pose is off the grid or too close to an obstacle"
+            elif start_state is None:
+                self.unreachable[obstacle.index] = "the robot starts off the grid or too close to an obstacle"
+            elif not reachability.can_reach([start_state], states):
+                self.unreachable[obstacle.index] = "no scan pose can be reached from the start"
+            else:
+                goal_states[obstacle] = states
+
+        blocked_pairs = {(a, b) for a in goal_states for b in goal_states
+                         if a is not b and not reachability.can_reach(goal_states[a], goal_states[b])}
+        self.log.info("Checked reachability")
+        for index, reason in self.unreachable.items():
+            self.log.info(f"Skipping obstacle {index}: {reason}")
+        return list(goal_states), blocked_pairs
+
+    def compute_simple_hamiltonian_path(self, start, obstacles, blocked_pairs) -> Tuple[Obstacle]:
 
         # Generate all possible sequences of obstacles
-        perms = list(itertools.permutations(self.grid.obstacles))
+        perms = list(itertools.permutations(obstacles))
+        # Skip orderings with a leg that cannot be driven. If every ordering has one, keep them all, so that the
+        # retries can still find the best partial path.
+        feasible = [path for path in perms if not any(pair in blocked_pairs for pair in zip(path, path[1:]))]
+        if feasible:
+            self.log.info(f"Skipping {len(perms) - len(feasible)} of {len(perms)} orderings with an unreachable leg")
+            perms = feasible
 
         index_list = [[] for i in range(len(perms))]
-        # Get the path that has the least distance travelled.
-        def calc_distance(path):
-            # Create all target points, including the start.
-            targets = [self.robot.pos.xy_pygame()]
-
-            for obstacle in path:
-                targets.append(obstacle.pos.xy_pygame())
-
-            dist = 0
-            for i in range(len(targets) - 1):
-                dist += math.sqrt(((targets[i][0] - targets[i + 1][0]) ** 2) +
-                                  ((targets[i][1] - targets[i + 1][1]) ** 2))
-            return dist
-
-        perms.sort(key=calc_distance)
-        print("Found a simple hamiltonian path:")
+        # Get the path with the least estimated cost.
+        def tour_cost(path):
+            # There are factorially many orderings, so this can take a while too.
+            if self.cancel is not None:
+                self.cancel.check()
+            return self.cost_model.tour_cost(start, path)
+
+        perms.sort(key=tour_cost)
+        self.log.info("Found a simple hamiltonian path")
         for i, simple in enumerate(perms):
             # print("simple: ")
             # print(simple)
@@ -54,72 +151,183 @@ class Brain:
         # print(perms)
         return perms, index_list
 
-    def compress_paths(self):
-        print("Compressing commands... ", end="")
-        index = 0
-        new_commands = deque()
-        while index < len(self.commands):
-            command = self.commands[index]
-            if isinstance(command, StraightCommand):
-                new_length = 0
-                while index < len(self.commands) and isinstance(self.commands[index], StraightCommand):
-                    new_length += self.commands[index].dist
-                    index += 1
-                command = StraightCommand(new_length)
-                new_commands.append(command)
-            else:
-                new_commands.append(command)
-                index += 1
-        self.commands = new_commands
-        print("Done!")
-
-    def plan_path(self):
-        print("-" * 70)
-        print("Starting path computation...")
-        simple_hamiltonians, index_lists = self.compute_simple_hamiltonian_path()
+    def compress_paths(self, start):
+        """
+        Peephole-optimise the planned commands, which start at the given position:
+            - Adjacent straights are merged into one, so forward-then-reverse moves cancel out.
+            - Zero-length straights are dropped.
+            - Adjacent turns that bring the robot back to where it was are dropped.
+        Removing a command can make its neighbours adjacent, so those are optimised again. Scans are never touched,
+        so moves are never merged across them.
+
+        Every step only removes motion, so the robot still only sweeps through space that the original commands did.
+        """
+        before = mission_time(self.commands), len(self.commands)
+
+        new_commands = []
+        # positions[i] is the robot position before new_commands[i], and positions[-1] the one after all of them.
+        positions = [start.copy()]
+
+        def push(command):
+            new_commands.append(command)
+            p = positions[-1].copy()
+            command.apply_on_pos(p)
+            positions.append(p)
+
+        def pop():
+            positions.pop()
+            return new_commands.pop()
+
+        for command in self.commands:
+            push(command)
+            while new_commands:
+                last = new_commands[-1]
+                prev = new_commands[-2] if len(new_commands) > 1 else None
+                if isinstance(last, StraightCommand) and last.dist == 0:
+                    pop()
+                elif isinstance(last, StraightCommand) and isinstance(prev, StraightCommand):
+                    dist = pop().dist + pop().dist
+                    push(StraightCommand(dist))
+                elif isinstance(last, TurnCommand) and isinstance(prev, TurnCommand) and \
+                        self.same_position(positions[-3], positions[-1]):
+                    pop()
+                    pop()
+                else:
+                    break
+
+        self.commands = deque(new_commands)
+        after = mission_time(self.commands), len(self.commands)
+        self.log.info(f"Compressed commands. Mission time: {before[0]:.2f}s ({before[1]} commands) -> {after[0]:.2f}s ({after[1]} commands)")
+        return before[0], after[0]
+
+    def find_path(self, start, goals):
+        """
+        Find the cheapest path from start to any of the goals, adding its commands to self.commands and returning
+        where it ends, or None if there is no path.
+
+        On large grids, a corridor is found on the coarse grid first and only the cells inside it are searched. The
+        whole grid is only searched if that finds nothing.
+        """
+        if self.coarse_grid is not None:
+            corridor = self.coarse_grid.find_corridor(start, [pos for pos, _ in goals])
+            if corridor is not None:
+                astar = ModifiedAStar(self.grid, self, start, goals, corridor)
+                res = astar.start_astar()
+                self.expansions += astar.expansions
+                if res is not None:
+                    self.commands.extend(astar.commands)
+                    return res
+                self.log.info("No path found inside the corridor, searching the whole grid")
+        if self.segment_cache is not None and (entry := self.segment_cache.get(self, start, goals)) is not None:
+            self.commands.extend(entry.make_commands())
+            return entry.end.copy()
+        astar = ModifiedAStar(self.grid, self, start, goals)
+        res = astar.start_astar()
+        self.expansions += astar.expansions
+        if res is not None:
+            self.commands.extend(astar.commands)
+            if self.segment_cache is not None:
+                self.segment_cache.put(self, start, goals, astar.total_cost, astar.path, res)
+        return res
+
+    def get_targets(self, obstacle):
+        """
+        Get the poses the obstacle can be scanned from, each with the cost of scanning from there instead of the
+        ideal pose.
+        """
+        return [(pos, self.cost_model.distance_cost(offset) * PATH_TARGET_OFFSET_PENALTY)
+                for pos, offset in obstacle.get_robot_target_positions(self.grid.cell_length)]
+
+    @staticmethod
+    def same_position(a, b, tolerance=1e-6):
+        return abs(a.x - b.x) < tolerance and abs(a.y - b.y) < tolerance and \
+            abs((a.angle - b.angle + 180) % 360 - 180) < tolerance
+
+    def plan_path(self, on_progress=None, start=None):
+        """
+        Plan a path visiting every obstacle and return the order in which obstacles are visited.
+
+        start is where the robot starts, by default where the robot is now.
+
+        on_progress, if given, is called as on_progress(event, data) while planning, possibly from another thread:
+            - ("attempt", index_list) when a new obstacle ordering is tried. Legs reported before are discarded.
+            - ("leg", (obstacle_index, commands)) when the leg to an obstacle, ending with its scan, is planned.
+            - ("done", (index_list, complete)) when planning is finished. If no complete path was found, the
+              final commands come from an earlier, partial attempt.
+        """
+        self.log.info("Starting path computation...")
+        self.expansions = 0
+        # Keep our own copy, as the robot may already be moving while we plan.
+        start = (start or self.robot.pos).copy()
+        if self.trace is not None:
+            self.trace.obstacles(self.grid.obstacles)
+            self.trace.start(start)
+        obstacles, blocked_pairs = self.check_reachability(start)
+        simple_hamiltonians, index_lists = self.compute_simple_hamiltonian_path(start, obstacles, blocked_pairs)
         max_obs_visited_commands = deque()
         max_obs_visited_count = 0
-        command_length_when_max_obs_visited = 0
+        cost_when_max_obs_visited = math.inf
+        best_attempt = 0
         # for i in range(len(simple_hamiltonians)):
-        for i in range(MAX_RETRY):
+        for i in range(min(self.config.max_retry, len(simple_hamiltonians))):
             not_found = 0
             self.simple_hamiltonian = simple_hamiltonians[i]
             self.commands = deque()
             index_list = index_lists[i]
-            curr = self.robot.pos.copy()  # We use a copy rather than get a reference.
+            if on_progress:
+                on_progress("attempt", index_list)
+            if self.trace is not None:
+                self.trace.attempt(i)
+            if self.cancel is not None:
+                self.cancel.check()
+            curr = start.copy()  # We use a copy rather than get a reference.
+            prev = None
             for obstacle in self.simple_hamiltonian:
+                if (prev, obstacle) in blocked_pairs:
+                    not_found = 1
+                    self.log.info(f"No path can exist from {prev} to {obstacle}")
+                    break
+                prev = obstacle
+                leg_start = len(self.commands)
                 target = obstacle.get_robot_target_pos()
-                print("-" * 70)
-                print(f"Planning {curr} to {target}")
-                res = ModifiedAStar(self.grid, self, curr, target).start_astar()
+                self.log.info(f"Planning {curr} to {target}")
+                if self.trace is not None:
+                    self.trace.search(obstacle.index)
+                res = self.find_path(curr, self.get_targets(obstacle))
                 if res is None:
                     not_found = 1
-                    print(f"No path found from {curr} to {obstacle}")
+                    self.log.info(f"No path found from {curr} to {obstacle}")
                     break
                 else:
-                    print("Path found.")
+                    self.log.info("Path found.")
                     curr = res
                     self.commands.append(ScanCommand(ROBOT_SCAN_TIME, obstacle.index))
+                    leg = list(itertools.islice(self.commands, leg_start, None))
+                    if on_progress:
+                        on_progress("leg", (obstacle.index, leg))
+                    if self.trace is not None:
+                        self.trace.commands(leg)
             if not_found:
-                scan_count, command_length = self.count_scan_commands(self.commands)
-                if scan_count > max_obs_visited_count:
-                    max_obs_visited_count = scan_count
-                    max_obs_visited_commands = self.commands
-                elif scan_count == max_obs_visited_count and command_length_when_max_obs_visited > command_length:
+                # Rank partial paths by the number of obstacles visited, then by cost.
+                scan_count, _ = self.count_scan_commands(self.commands)
+                cost = self.cost_model.commands_cost(self.commands)
+                if scan_count > max_obs_visited_count or \
+                        (scan_count == max_obs_visited_count and cost < cost_when_max_obs_visited):
                     max_obs_visited_count = scan_count
-                    command_length_when_max_obs_visited = command_length
+                    cost_when_max_obs_visited = cost
                     max_obs_visited_commands = self.commands
+                    best_attempt = i
                 continue
-            self.compress_paths()
-            print("-" * 70)
+            self.compress_paths(start)
+            self.complete = True
+            if self.trace is not None:
+                self.trace.done(self.commands, True)
+            if on_progress:
+                on_progress("done", (index_list, True))
 
             return index_list
         
-        print()
-        print("-" * 70)
-        print("NO COMPLETE PATH FOUND!!!")
-        print("-" * 70)
-        print()
+        self.log.warning("NO COMPLETE PATH FOUND!!!")
         
         # if no path found then fall back to the best path and ignore the inaccessible ones
         # index_list = index_lists[0]
@@ -127,7 +335,6 @@ class Brain:
         # self.commands = deque()
         # for obstacle in self.simple_hamiltonian:
         #     target = obstacle.get_robot_target_pos()
-        #     print("-" * 70)
         #     print(f"Planning {curr} to {target}")
         #     res = ModifiedAStar(self.grid, self, curr, target).start_astar()
         #     if res is None:
@@ -139,8 +346,14 @@ class Brain:
         #         self.commands.append(ScanCommand(ROBOT_SCAN_TIME, obstacle.index))
 
         self.commands = max_obs_visited_commands
-        self.compress_paths()
-        print("-" * 70)
+        self.simple_hamiltonian = simple_hamiltonians[best_attempt]
+        index_list = index_lists[best_attempt]
+        self.compress_paths(start)
+        self.complete = False
+        if self.trace is not None:
+            self.trace.done(self.commands, False)
+        if on_progress:
+            on_progress("done", (index_list, False))
 
         return index_list
     
@@ -0,0 +1,67 @@
+from typing import Dict, List, Optional, Sequence, Tuple
+from Map.grid import Grid
+from Map.obstacle import Obstacle
+from Map.position import RobotPosition
+from Robot.commands import Command, ScanCommand, mission_time
+from Robot.path_mgr import Brain, PlannerConfig
+from Settings.attributes import *
+
+
+class Plan:
+    def __init__(self, commands: List[Command], index_list: List[int], complete: bool, unreachable: Dict[int, str],
+                 expansions: int = 0, simple_hamiltonian: Tuple[Obstacle] = ()):
+        """
+        The result of plan().
+
+        commands -> What the robot should do, in order.
+        index_list -> The order in which the obstacles were planned to be visited.
+        complete -> Whether every reachable obstacle is visited. If not, commands come from the best partial attempt.
+        unreachable -> Why each obstacle that cannot be visited at all was skipped, by obstacle index.
+        expansions -> How many states the path finder expanded, a measure of the planning effort.
+        simple_hamiltonian -> The obstacles in the order planned, as drawn by Robot.draw_simple_hamiltonian_path().
+        """
+        self.commands = commands
+        self.index_list = index_list
+        self.complete = complete
+        self.unreachable = unreachable
+        self.expansions = expansions
+        self.simple_hamiltonian = simple_hamiltonian
+
+    def __str__(self):
+        return f"Plan({len(self.commands)} commands, visits {self.visited()}, {self.mission_time():.2f}s)"
+
+    __repr__ = __str__
+
+    def messages(self) -> List[str]:
+        """
+        The commands as messages for the RPi, see Command.convert_to_message().
+        """
+        return [command.convert_to_message() for command in self.commands]
+
+    def visited(self) -> List[int]:
+        """
+        Indices of the obstacles scanned, in order.
+        """
+        return [command.obj_index for command in self.commands if isinstance(command, ScanCommand)]
+
+    def mission_time(self) -> float:
+        return mission_time(self.commands)
+
+
+def plan(obstacles: Sequence[Obstacle], start: Optional[RobotPosition] = None,
+         config: Optional[PlannerConfig] = None) -> Plan:
+    """
+    Plan a path from start (by default, the robot's starting position) that scans every obstacle.
+
+    Every call works on its own grid and state, and only reads the obstacles and start it is given, so it is safe to
+    call from many threads at once.
+    """
+    config = config or PlannerConfig()
+    if start is None:
+        start = RobotPosition(ROBOT_START_X, ROBOT_START_Y, Direction.TOP, 90)
+
+    grid = Grid(obstacles, config.grid_length, config.cell_length)
+    brain = Brain(None, grid, config=config)
+    index_list = brain.plan_path(start=start)
+    return Plan(list(brain.commands), index_list, brain.complete, dict(brain.unreachable), brain.expansions,
+                tuple(brain.simple_hamiltonian))
@@ -0,0 +1,126 @@
+from typing import Dict, List, Optional, Set, Tuple
+from Map.grid import Grid
+from Map.position import RobotPosition
+from Robot.commands import MotionPrimitive
+
+State = Tuple[float, float, object]  # (x, y) of a grid cell's center, and a Direction.
+
+
+class Reachability:
+    def __init__(self, grid: Grid, primitives: List[MotionPrimitive]):
+        """
+        Which poses can be driven to from which, worked out once per grid.
+
+        The path finder's states are (grid cell, direction) pairs, linked by motion primitives. Every link is checked
+        once, from the center of its cell, and the strongly connected components of the resulting graph are found:
+        within a component every state can reach every other one, and reachability between components follows the
+        (acyclic) links between them.
+
+        Positions within a cell are rounded to its center, so this is a close approximation of what ModifiedAStar can
+        do rather than an exact one. It is used to avoid searching for paths that cannot exist.
+        """
+        self.grid = grid
+        self.primitives = primitives
+        self.successors = self.build_successors()
+        self.component = self.find_components()
+        self.component_successors: Dict[int, Set[int]] = {number: set() for number in self.component.values()}
+        for state, after in self.successors.items():
+            for child in after:
+                if self.component[child] != self.component[state]:
+                    self.component_successors[self.component[state]].add(self.component[child])
+        # The components each component can reach, including itself. Filled in on demand.
+        self.reachable_components: Dict[int, Set[int]] = dict()
+
+    def state(self, pos: RobotPosition) -> Optional[State]:
+        """
+        Get the state the position is in, or None if it is off the grid or blocked.
+        """
+        node = self.grid.get_coordinate_node(*pos.xy())
+        if node is None or node.occupied:
+            return None
+        return node.x, node.y, pos.direction
+
+    def build_successors(self) -> Dict[State, List[State]]:
+        successors = dict()
+        for row in self.grid.nodes:
+            for node in row:
+                if node.occupied:
+                    continue
+                for direction in self.primitives[0].footprints:
+                    after = []
+                    for primitive in self.primitives:
+                        footprint = primitive.footprints[direction]
+                        state = self.state(RobotPosition(node.x + footprint.dx, node.y + footprint.dy,
+                                                         footprint.direction))
+                        if state is not None and self.grid.check_valid_move(node.x, node.y, footprint):
+                            after.append(state)
+                    successors[node.x, node.y, direction] = after
+        return successors
+
+    def find_components(self) -> Dict[State, int]:
+        """
+        Number the strongly connected components of the state graph, using Tarjan's algorithm. Components are
+        numbered in reverse topological order: every link between components goes to a lower number.
+        """
+        component = dict()
+        index = dict()
+        low = dict()
+        stack = []
+        on_stack = set()
+        counter = 0
+        components = 0
+
+        for root in self.successors:
+            if root in index:
+                continue
+            # Iterative depth-first search, as the graph is too deep for recursion.
+            work = [(root, iter(self.successors[root]))]
+            index[root] = low[root] = counter
+            counter += 1
+            stack.append(root)
+            on_stack.add(root)
+            while work:
+                state, children = work[-1]
+                for child in children:
+                    if child not in index:
+                        index[child] = low[child] = counter
+                        counter += 1
+                        stack.append(child)
+                        on_stack.add(child)
+                        work.append((child, iter(self.successors[child])))
+                        break
+                    if child in on_stack:
+                        low[state] = min(low[state], index[child])
+                else:
+                    work.pop()
+                    if work:
+                        parent = work[-1][0]
+                        low[parent] = min(low[parent], low[state])
+                    if low[state] == index[state]:
+                        while True:
+                            member = stack.pop()
+                            on_stack.discard(member)
+                            component[member] = components
+                            if member == state:
+                                break
+                        components += 1
+        return component
+
+    def get_reachable_components(self, number: int) -> Set[int]:
+        if number not in self.reachable_components:
+            reachable = {number}
+            pending = [number]
+            while pending:
+                for child in self.component_successors[pending.pop()]:
+                    if child not in reachable:
+                        reachable.add(child)
+                        pending.append(child)
+            self.reachable_components[number] = reachable
+        return self.reachable_components[number]
+
+    def can_reach(self, sources: List[State], targets: List[State]) -> bool:
+        """
+        Whether any of the target states can be reached from any of the source states.
+        """
+        target_components = {self.component[state] for state in targets}
+        return any(target_components & self.get_reachable_components(self.component[state]) for state in sources)
@@ -1,14 +1,15 @@
-import pygame
+import math
 import datetime
 from Map.position import RobotPosition
 from Settings.attributes import *
+from Settings.config import *
 from Settings.colors import *
 from Robot.commands import *
 from Robot.path_mgr import Brain
 
 
 class Robot:
-    def __init__(self, grid):
+    def __init__(self, grid, config=None):
         self.pos = RobotPosition(ROBOT_START_X,
                                  ROBOT_START_Y,
                                  Direction.TOP,
@@ -16,16 +17,38 @@ class Robot:
 
         self._start_copy = self.pos.copy()
 
-        self.brain = Brain(self, grid)
+        self.brain = Brain(self, grid, config=config)
 
-        self.__image = pygame.transform.scale(pygame.image.load("Assets/robot.png"),
-                                              (100, 100))
-
-        self.path_hist = []  # Stores the history of the path taken by the robot.
+        # The path taken by the robot, as the points where it changed course. The robot's current position ends it.
+        self.path_hist = [self.pos.xy_pygame()]
+        self.hist_angle = self.pos.angle  # Heading at the last point in path_hist.
+        # The segments of path_hist already drawn, kept on a transparent surface so that they are never redrawn.
+        self.trail = None
+        self.trail_drawn = 0  # Number of points in path_hist whose segments are drawn on the trail.
 
+        self.__commands = []  # Commands queued for execution in the simulation.
         self.__current_command = 0  # Index of the current command being executed.
         self.printed = False  # Never printed total time before.
 
+    def reset(self):
+        """
+        Move the robot back to its starting position and drop all queued commands.
+        """
+        self.pos = self._start_copy.copy()
+        self.path_hist = [self.pos.xy_pygame()]
+        self.hist_angle = self.pos.angle
+        self.trail = None
+        self.trail_drawn = 0
+        self.__commands = []
+        self.__current_command = 0
+        self.printed = False
+
+    def queue_commands(self, commands):
+        """
+        Append commands to be executed after the ones already queued.
+        """
+        self.__commands.extend(commands)
+
     def get_current_pos(self):
         return self.pos
 
@@ -43,6 +66,9 @@ class Robot:
         return string_commands
 
 
+    def has_pending_commands(self):
+        return self.__current_command < len(self.__commands)
+
     def turn(self, d_angle, rev):
         TurnCommand(d_angle, rev).apply_on_pos(self.pos)
 
@@ -50,21 +76,72 @@ class Robot:
         StraightCommand(dist).apply_on_pos(self.pos)
 
     def draw_simple_hamiltonian_path(self, screen):
+        import pygame
         prev = self._start_copy.xy_pygame()
         for obs in self.brain.simple_hamiltonian:
             target = obs.get_robot_target_pos().xy_pygame()
             pygame.draw.line(screen, BLUE, prev, target)
             prev = target
 
+    def get_bounds(self):
+        """
+        Get a screen rectangle that always contains the drawn robot, whatever its heading.
+        """
+        import pygame
+        side = math.ceil(self.get_image().get_width() * math.sqrt(2)) + 4
+        rect = pygame.Rect(0, 0, side, side)
+        rect.center = self.pos.xy_pygame()
+        return rect
+
+    @staticmethod
+    def get_image():
+        from GUI.assets import get_image
+        return get_image("robot.png", (100, 100))
+
     def draw_self(self, screen):
-        rot_image = pygame.transform.rotate(self.__image, -(90 - self.pos.angle))
+        import pygame
+        rot_image = pygame.transform.rotate(self.get_image(), -(90 - self.pos.angle))
         rect = rot_image.get_rect()
         rect.center = self.pos.xy_pygame()
         screen.blit(rot_image, rect)
 
+    def add_hist_point(self):
+        self.path_hist.append(self.pos.xy_pygame())
+        self.hist_angle = self.pos.angle
+
+    def follow_pose(self, x, y, angle, command_done):
+        """
+        Move the robot to a pose streamed by the backend (see Comms/telemetry.py) instead of carrying out commands.
+        The trail is kept like update() keeps it.
+        """
+        self.pos.x, self.pos.y, self.pos.angle = x, y, angle
+        if abs(self.pos.angle - self.hist_angle) >= TRAIL_ANGLE_STEP or \
+                (command_done and self.pos.xy_pygame() != self.path_hist[-1]):
+            self.add_hist_point()
+
+    @staticmethod
+    def draw_trail_segment(surface, start, end):
+        import pygame
+        pygame.draw.line(surface, BLACK, start, end, 6)
+        pygame.draw.circle(surface, BLACK, end, 3)
+
     def draw_historic_path(self, screen):
-        for dot in self.path_hist:
-            pygame.draw.circle(screen, BLACK, dot, 3)
+        """
+        Draw the path taken by the robot. Only segments added since the last call are drawn onto the trail surface,
+        so the cost does not grow with the length of the path.
+        """
+        import pygame
+        if self.trail is None or self.trail.get_size() != screen.get_size():
+            self.trail = pygame.Surface(screen.get_size(), pygame.SRCALPHA)
+            pygame.draw.circle(self.trail, BLACK, self.path_hist[0], 3)
+            self.trail_drawn = 1
+        for i in range(self.trail_drawn, len(self.path_hist)):
+            self.draw_trail_segment(self.trail, self.path_hist[i - 1], self.path_hist[i])
+        self.trail_drawn = len(self.path_hist)
+
+        # Blitting only touches the screen's clipping area.
+        screen.blit(self.trail, (0, 0))
+        self.draw_trail_segment(screen, self.path_hist[-1], self.pos.xy_pygame())
 
     def draw(self, screen):
         # Draw the robot.
@@ -75,32 +152,32 @@ class Robot:
         self.draw_historic_path(screen)
 
     def update(self):
-        # Store historic path
-        if len(self.path_hist) == 0 or self.pos.xy_pygame() != self.path_hist[-1]:
-            # Only add a new point history if there is none, and it is different from previous history.
-            self.path_hist.append(self.pos.xy_pygame())
-
         # If no more commands to execute, then return.
-        if self.__current_command >= len(self.brain.commands):
+        if self.__current_command >= len(self.__commands):
             return
 
         # Check current command has non-null ticks.
         # Needed to check commands that have 0 tick execution time.
-        if self.brain.commands[self.__current_command].total_ticks == 0:
+        if self.__commands[self.__current_command].total_ticks == 0:
             self.__current_command += 1
-            if self.__current_command >= len(self.brain.commands):
+            if self.__current_command >= len(self.__commands):
                 return
 
 
-        command: Command = self.brain.commands[self.__current_command]
+        command: Command = self.__commands[self.__current_command]
         command.process_one_tick(self)
+        # Turns are kept as a point every few degrees, straights only by their ends.
+        if abs(self.pos.angle - self.hist_angle) >= TRAIL_ANGLE_STEP:
+            self.add_hist_point()
 
         if command.ticks <= 0:
+            if self.pos.xy_pygame() != self.path_hist[-1]:
+                self.add_hist_point()
             print(f"Finished processing {command}, {self.pos}")
             self.__current_command += 1
-            if self.__current_command == len(self.brain.commands) and not self.printed:
+            if self.__current_command == len(self.__commands) and not self.printed:
                 total_time = 0
-                for command in self.brain.commands:
+                for command in self.__commands:
                     total_time += command.time
                     total_time = round(total_time)
                 self.printed = True
\ No newline at end of file
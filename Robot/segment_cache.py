@@ -0,0 +1,121 @@
+import math
+import threading
+from collections import OrderedDict
+from typing import List, Optional, Tuple
+from Map.position import RobotPosition
+from Robot.commands import MotionPrimitive
+from Settings.attributes import *
+
+Box = Tuple[float, float, float, float]  # (left, bottom, right, top)
+
+
+def round_pose(pos: RobotPosition):
+    return round(pos.x, 6), round(pos.y, 6), round(pos.angle, 6), pos.direction
+
+
+def ellipse_box(a: RobotPosition, b: RobotPosition, length) -> Box:
+    """
+    Get the bounding box of all points whose distances to a and b add up to at most length.
+    """
+    c = math.hypot(b.x - a.x, b.y - a.y) / 2
+    major = length / 2
+    minor = math.sqrt(max(major ** 2 - c ** 2, 0))
+    ux, uy = ((b.x - a.x) / (2 * c), (b.y - a.y) / (2 * c)) if c else (1, 0)
+    half_x = math.sqrt((major * ux) ** 2 + (minor * uy) ** 2)
+    half_y = math.sqrt((major * uy) ** 2 + (minor * ux) ** 2)
+    cx, cy = (a.x + b.x) / 2, (a.y + b.y) / 2
+    return cx - half_x, cy - half_y, cx + half_x, cy + half_y
+
+
+def boxes_overlap(a: Box, b: Box):
+    return a[0] < b[2] and b[0] < a[2] and a[1] < b[3] and b[1] < a[3]
+
+
+class SegmentEntry:
+    def __init__(self, region: Box, obstacles: frozenset, path: List[MotionPrimitive], end: RobotPosition):
+        """
+        A leg found by A*, as the primitives along it, and what it depends on.
+
+        region -> Where any path that is at least as cheap must lie.
+        obstacles -> The obstacles overlapping region, as (x, y, direction) tuples.
+        """
+        self.region = region
+        self.obstacles = obstacles
+        self.path = path
+        self.end = end
+
+    def make_commands(self):
+        # Commands keep track of their own execution, so every plan gets its own.
+        return [command for primitive in self.path for command in primitive.make_commands()]
+
+
+class SegmentCache:
+    def __init__(self, size=PATH_SEGMENT_CACHE_SIZE):
+        """
+        Legs found by A*, kept across plans so that layouts that only differ away from a leg can reuse it.
+
+        A leg of cost C to a goal with penalty p only drives (C - p) / distance_cost(1) or less, so every path that is
+        at least as cheap stays inside an ellipse around its start and that goal. Obstacles only affect moves that
+        overlap their virtual obstacle, so if the obstacles overlapping those ellipses are the same, A* would find a
+        path that is just as cheap, and the cached leg is valid and optimal. Checking this only takes a pass over the
+        obstacles.
+
+        Only legs searched on the whole grid are cached: a leg found inside a corridor also depends on the coarse
+        grid.
+        """
+        self.size = size
+        self.entries = OrderedDict()  # Newest last: (settings, start, goals) -> [SegmentEntry].
+        self.lock = threading.Lock()  # Brains on several threads share one cache.
+
+    @staticmethod
+    def make_key(brain, start: RobotPosition, goals):
+        grid = brain.grid
+        settings = (brain.primitives, brain.primitive_costs, grid.length, grid.cell_length)
+        return settings, round_pose(start), tuple((*round_pose(end), round(penalty, 9)) for end, penalty in goals)
+
+    @staticmethod
+    def obstacles_in(grid, region: Box) -> frozenset:
+        return frozenset((obstacle.pos.x, obstacle.pos.y, obstacle.pos.direction) for obstacle in grid.obstacles
+                         if boxes_overlap(region, obstacle.get_boundary_box()))
+
+    def get(self, brain, start: RobotPosition, goals) -> Optional[SegmentEntry]:
+        key = self.make_key(brain, start, goals)
+        with self.lock:
+            entries = self.entries.get(key)
+            if not entries:
+                return None
+            self.entries.move_to_end(key)
+            entries = list(entries)
+        for entry in entries:
+            if self.obstacles_in(brain.grid, entry.region) == entry.obstacles:
+                return entry
+        return None
+
+    def put(self, brain, start: RobotPosition, goals, cost, path: List[MotionPrimitive], end: RobotPosition):
+        per_unit = brain.cost_model.distance_cost(1)  # Both cost models charge distance linearly.
+        # A* stops anywhere in the goal's cell, so paths may end up to half a cell diagonal away from the goal.
+        slack = brain.grid.cell_length * math.sqrt(2)
+        margin = brain.grid.cell_length  # Room for rounding errors.
+        left = bottom = math.inf
+        right = top = -math.inf
+        for goal, penalty in goals:
+            if cost - penalty < 0:
+                continue  # Not reachable at this cost.
+            box = ellipse_box(start, goal, (cost - penalty) / per_unit + slack)
+            left, bottom = min(left, box[0]), min(bottom, box[1])
+            right, top = max(right, box[2]), max(top, box[3])
+        region = left - margin, bottom - margin, right + margin, top + margin
+        entry = SegmentEntry(region, self.obstacles_in(brain.grid, region), list(path), end.copy())
+
+        key = self.make_key(brain, start, goals)
+        with self.lock:
+            entries = self.entries.setdefault(key, [])
+            entries.insert(0, entry)
+            del entries[PATH_SEGMENT_CACHE_VARIANTS:]
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.size:
+                self.entries.popitem(last=False)
+
+
+# Shared by every planner in the process, see PlannerConfig.
+shared_segment_cache = SegmentCache()
@@ -0,0 +1,153 @@
+import math
+import struct
+from typing import BinaryIO, List, Tuple
+from Map.obstacle import Obstacle
+from Map.position import RobotPosition
+from Robot.commands import Command, command_from_message
+from Settings.attributes import *
+from Settings.config import *
+
+# A trace file is MAGIC followed by records. Every record is a 1 byte type followed by its payload, little-endian.
+MAGIC = b"ALGOTRC2"
+
+RECORD_OBSTACLE = 1  # x, y (scaled), image direction in degrees, index.
+RECORD_START = 2  # x, y, angle of the robot before planning.
+RECORD_ATTEMPT = 3  # Number of the obstacle ordering now being tried, from 0.
+RECORD_SEARCH = 4  # Index of the obstacle that the next expansions search a path to.
+RECORD_EXPAND = 5  # x, y, angle of the expanded state, its cost so far (g) and heuristic (h), and the x, y of the
+# center of its parent's grid cell (NaN for the start).
+RECORD_COMMAND = 6  # Message of a command of the leg just planned, see Command.convert_to_message(). Messages are
+# stored as their length in bytes, followed by that many bytes.
+RECORD_FINAL = 7  # Message of a command of the final plan, stored the same way.
+RECORD_DONE = 8  # Whether the final plan visits every reachable obstacle. Comes last.
+
+PAYLOADS = {
+    RECORD_OBSTACLE: struct.Struct("<ffhh"),
+    RECORD_START: struct.Struct("<fff"),
+    RECORD_ATTEMPT: struct.Struct("<H"),
+    RECORD_SEARCH: struct.Struct("<h"),
+    RECORD_EXPAND: struct.Struct("<ffhffff"),
+    RECORD_COMMAND: struct.Struct("<B"),
+    RECORD_FINAL: struct.Struct("<B"),
+    RECORD_DONE: struct.Struct("<?"),
+}
+RECORDS = {kind: struct.Struct("<B" + payload.format[1:]) for kind, payload in PAYLOADS.items()}
+MESSAGE_RECORDS = {RECORD_COMMAND, RECORD_FINAL}  # Payloads followed by as many bytes as their length says.
+MAX_MESSAGE_LENGTH = 255
+
+DIRECTIONS = {direction.value: direction for direction in Direction}
+
+
+class TraceRecorder:
+    def __init__(self, file: BinaryIO):
+        """
+        Records what the planner does into a binary file opened for writing, see PlannerConfig. Each expansion takes
+        27 bytes.
+        """
+        self.file = file
+        self.file.write(MAGIC)
+
+    @classmethod
+    def open(cls, path):
+        return cls(open(path, "wb"))
+
+    def close(self):
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def write(self, kind, *values):
+        self.file.write(RECORDS[kind].pack(kind, *values))
+
+    def obstacles(self, obstacles: List[Obstacle]):
+        for obstacle in obstacles:
+            self.write(RECORD_OBSTACLE, obstacle.pos.x, obstacle.pos.y, obstacle.pos.direction.value, obstacle.index)
+
+    def start(self, pos: RobotPosition):
+        self.write(RECORD_START, pos.x, pos.y, pos.angle)
+
+    def attempt(self, number):
+        self.write(RECORD_ATTEMPT, number)
+
+    def search(self, obstacle_index):
+        self.write(RECORD_SEARCH, obstacle_index)
+
+    def expand(self, pos: RobotPosition, g, h, parent):
+        px, py = (parent.x, parent.y) if parent is not None else (math.nan, math.nan)
+        self.write(RECORD_EXPAND, pos.x, pos.y, round(pos.angle), g, h, px, py)
+
+    def commands(self, commands: List[Command], kind=RECORD_COMMAND):
+        for command in commands:
+            message = command.convert_to_message().encode()
+            if len(message) > MAX_MESSAGE_LENGTH:
+                raise ValueError(f"Command message {message!r} is too long to record")
+            self.write(kind, len(message))
+            self.file.write(message)
+
+    def done(self, commands: List[Command], complete):
+        self.commands(commands, RECORD_FINAL)
+        self.write(RECORD_DONE, complete)
+
+
+class Trace:
+    def __init__(self):
+        """
+        A trace read back from a file.
+
+        obstacles -> The obstacles that were planned for.
+        start -> Where the robot started.
+        events -> Everything else except the final plan, in order, as (record type, values) pairs. Expansions are
+                  (x, y, angle, g, h, parent_x, parent_y), command messages are converted back into commands.
+        commands -> The final plan.
+        complete -> Whether the final plan visits every reachable obstacle, None if planning did not finish.
+        """
+        self.obstacles: List[Obstacle] = []
+        self.start = None
+        self.events: List[Tuple[int, tuple]] = []
+        self.commands: List[Command] = []
+        self.complete = None
+
+    def expansions(self):
+        return sum(kind == RECORD_EXPAND for kind, _ in self.events)
+
+
+def read_trace(path) -> Trace:
+    with open(path, "rb") as file:
+        data = file.read()
+    if not data.startswith(MAGIC):
+        raise ValueError(f"{path} is not a planner trace")
+
+    trace = Trace()
+    offset = len(MAGIC)
+    while offset < len(data):
+        kind = data[offset]
+        values = PAYLOADS[kind].unpack_from(data, offset + 1)
+        offset += RECORDS[kind].size
+        if kind in MESSAGE_RECORDS:
+            length, = values
+            if offset + length > len(data):
+                raise ValueError(f"{path} ends in the middle of a record")
+            values = data[offset:offset + length],
+            offset += length
+
+        if kind == RECORD_OBSTACLE:
+            x, y, direction, index = values
+            trace.obstacles.append(Obstacle(round(x / SCALING_FACTOR), round(y / SCALING_FACTOR),
+                                            DIRECTIONS[direction], index))
+        elif kind == RECORD_START:
+            x, y, angle = values
+            trace.start = RobotPosition(x, y, DIRECTIONS.get(round(angle)))
+            trace.start.angle = angle
+        elif kind == RECORD_FINAL:
+            trace.commands.append(command_from_message(values[0].decode()))
+        elif kind == RECORD_DONE:
+            trace.complete = values[0]
+        elif kind == RECORD_COMMAND:
+            trace.events.append((kind, (command_from_message(values[0].decode()),)))
+        else:
+            trace.events.append((kind, values))
+    return trace
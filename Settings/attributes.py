@@ -10,6 +10,12 @@ class Direction(Enum):
 
 RPI_HOST: str = "192.168.1.1"
 RPI_PORT: int = 6000
+RPI_ACK_WINDOW = 8  # Commands sent ahead of the last one acknowledged by the RPi.
+RPI_TIMEOUT = 5.0  # Seconds to wait for a connection or an ack before (re)connecting.
+RPI_RECONNECT_DELAY = 0.5  # Seconds between connection attempts.
+
+TELEMETRY_URL = "ws://127.0.0.1:8000/telemetry"  # Where the backend streams planned paths to viewers.
+TELEMETRY_RATE = 20  # Robot poses streamed per second, unless the viewer asks for something else.
 
 # Robot Attributes
 ROBOT_START_X = 15 * SCALING_FACTOR
@@ -27,12 +33,39 @@ GRID_LENGTH = 200 * SCALING_FACTOR  # Movement area is 200cm by 200cm
 GRID_CELL_LENGTH = 10 * SCALING_FACTOR  # Grid cell is 10cm by 10cm
 GRID_START_BOX_LENGTH = 30 * SCALING_FACTOR  # Recommended starting area is 40cm by 40cm
 GRID_NUM_GRIDS = GRID_LENGTH // GRID_CELL_LENGTH  # Number of grid cells
+# The robot's center must stay further than this from the arena's edges. Note that this lets the robot overextend the
+# border a little, as it is less than ROBOT_SAFETY_DISTANCE.
+GRID_BORDER_MARGIN = 5 * SCALING_FACTOR
 
 # Obstacle Attributes
 OBSTACLE_LENGTH = 10 * SCALING_FACTOR  # Obstacle is 10cm by 10cm
 OBSTACLE_SAFETY_WIDTH = ROBOT_SAFETY_DISTANCE + OBSTACLE_LENGTH // 2  # With respect to the center of the obstacle
+# Other poses the image may be scanned from, as (sideways, further back) offsets in grid cells from the ideal pose.
+OBSTACLE_TARGET_OFFSETS = ((-1, 0), (1, 0), (0, 1))
 
 # Path Finding Attributes
+PATH_COST_MODEL = "time"  # What the planner minimises: "time" (seconds), or "legacy" (distance, turns at PATH_TURN_COST)
 PATH_TURN_COST = 999 * ROBOT_SPEED_PER_SECOND * ROBOT_TURN_RADIUS
-PATH_TURN_CHECK_GRANULARITY = 1
+# Scanning away from the ideal pose costs as much as driving this many times the offset, so it is only chosen if it
+# saves at least that much.
+PATH_TARGET_OFFSET_PENALTY = 1.0
+# Motion primitive groups the path finder may use, see Robot/commands.py. Also available: "long_straight", "three_point"
+# and "lane_change". Lane changes are left out until the robot's firmware takes 45 degree turns, and stopping up to half
+# a cell from the scan pose is known to be fine.
+PATH_PRIMITIVES = ("straight", "turn90")
+# Grids with at least this many cells per side are planned coarse-to-fine: a corridor is found on a grid of
+# PATH_COARSE_BLOCK by PATH_COARSE_BLOCK cell blocks, widened by PATH_CORRIDOR_MARGIN blocks, and A* only searches
+# inside it. If that fails, the whole grid is searched.
+PATH_HIERARCHICAL_MIN_CELLS = 40
+PATH_COARSE_BLOCK = 4
+PATH_CORRIDOR_MARGIN = 1
+# Cells each way covered by the empty-arena cost-to-go table that A* uses as its heuristic, see Robot/cost_to_go.py.
+# Grids with more cells per side than it covers fall back to the straight-line distance.
+PATH_COST_TO_GO_WINDOW = GRID_NUM_GRIDS - 1
+PATH_TABLE_DIR = "tables"  # Where precomputed tables are stored, relative to the project root.
+# Legs kept for reuse by later plans, see Robot/segment_cache.py, and how many obstacle surroundings are kept for the
+# same start and goals.
+PATH_SEGMENT_CACHE_SIZE = 4096
+PATH_SEGMENT_CACHE_VARIANTS = 4
+PATH_CANCEL_POLL_INTERVAL = 0.05  # Most seconds between checks of whether planning has been cancelled.
 MAX_RETRY = 40
\ No newline at end of file
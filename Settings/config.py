@@ -1,7 +1,10 @@
-import socket
-
-
 # PyGame settings
 SCALING_FACTOR = 5
 FRAMES = 60
-WINDOW_SIZE = 1200, 1000
\ No newline at end of file
+WINDOW_SIZE = 1200, 1000
+
+# Simulation loop settings
+SIM_SPEED_MULTIPLIERS = (1, 10, None)  # Selected with the 1, 2 and 3 keys. None runs the simulation as fast as possible.
+SIM_MAX_FRAME_TIME = 0.25  # Longest real time (s) one frame may account for, so a stall does not cause a burst of ticks.
+REPLAY_EXPANSIONS_PER_TICK = 2  # Search expansions a replayed trace advances by per simulation tick.
+TRAIL_ANGLE_STEP = 5  # Degrees turned between the points kept for drawing the robot's trail.
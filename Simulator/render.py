@@ -0,0 +1,82 @@
+import io
+import zipfile
+from typing import List
+import pygame
+from Comms.telemetry import POSE_COMMAND, POSE_DONE, PoseStream, decode_poses
+from Map.grid import Grid
+from Map.obstacle import Obstacle
+from Robot.commands import command_from_message
+from Robot.planner import Plan
+from Robot.robot import Robot
+from Settings.attributes import *
+from Settings.colors import *
+
+
+class PlanRenderer:
+    def __init__(self, obstacles: List[Obstacle], layout_plan: Plan):
+        """
+        Draws a plan onto plain surfaces with the simulator's drawing code, so no display or window is needed.
+        """
+        self.grid = Grid(obstacles)
+        self.robot = Robot(self.grid)
+        self.robot.brain.simple_hamiltonian = layout_plan.simple_hamiltonian
+        self.layout_plan = layout_plan
+        self.arena = pygame.Surface((GRID_LENGTH, GRID_LENGTH))
+        self.arena.fill(MINT)
+        self.grid.draw(self.arena)
+
+    def draw(self) -> pygame.Surface:
+        surface = self.arena.copy()
+        self.robot.draw(surface)
+        return surface
+
+    def drive(self):
+        """
+        Carry out the plan one tick at a time, yielding the simulated time after each.
+        """
+        # Commands keep track of their own execution, so the plan's own are left alone.
+        commands = [command_from_message(message) for message in self.layout_plan.messages()]
+        stream = PoseStream(commands, self.robot.pos, rate=FRAMES)
+        while not stream.done():
+            for kind, _, elapsed, x, y, angle in decode_poses(stream.next_message()):
+                self.robot.follow_pose(x, y, angle, kind in (POSE_COMMAND, POSE_DONE))
+            yield elapsed
+
+
+def encode_png(surface: pygame.Surface) -> bytes:
+    buffer = io.BytesIO()
+    pygame.image.save(surface, buffer, "frame.png")
+    return buffer.getvalue()
+
+
+def render_png(obstacles: List[Obstacle], layout_plan: Plan) -> bytes:
+    """
+    Draw the arena with the planned route and the path the robot drives, as a PNG.
+    """
+    renderer = PlanRenderer(obstacles, layout_plan)
+    for _ in renderer.drive():
+        pass
+    return encode_png(renderer.draw())
+
+
+def render_frames(obstacles: List[Obstacle], layout_plan: Plan, rate) -> bytes:
+    """
+    Draw the robot carrying out the plan as PNG frames, rate per simulated second from the start to the end, in a
+    zip archive. Frames are named frame_00000.png, frame_00001.png and so on.
+    """
+    renderer = PlanRenderer(obstacles, layout_plan)
+    buffer = io.BytesIO()
+    # PNGs are compressed already.
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_STORED) as archive:
+        def add_frame():
+            archive.writestr(f"frame_{len(archive.filelist):05}.png", encode_png(renderer.draw()))
+
+        add_frame()
+        drawn = True
+        for elapsed in renderer.drive():
+            drawn = elapsed >= len(archive.filelist) / rate - 1e-6  # Times are sent as 4 byte floats.
+            if drawn:
+                add_frame()
+        if not drawn:
+            add_frame()  # The robot's final pose.
+    return buffer.getvalue()
@@ -1,54 +1,70 @@
+import logging
+import math
 import pygame
+import queue
 import sys
+import threading
 import time
 from abc import ABC, abstractmethod
 from typing import List
 from Map.obstacle import Obstacle
 from Map.grid import Grid
+from Map.position import Position
 from Settings.config import *
 from Settings.colors import *
 from Robot.robot import Robot
+from Robot.path_mgr import PlannerConfig
+from Robot.commands import ScanCommand
+from Robot.trace import Trace, TraceRecorder, RECORD_ATTEMPT, RECORD_COMMAND, RECORD_EXPAND
+from Comms.telemetry import POSE_COMMAND, POSE_DONE, POSE_START, layout_string, receive_telemetry
+from GUI.assets import get_image
 from GUI.button import Button
 
 
-class LogBuffer:
-    """Captures stdout from Robot/ and stores it for display in the GUI."""
+class LogBuffer(logging.Handler):
+    """Captures the planner's log and stores it for display in the GUI."""
     def __init__(self, original_stdout, max_lines: int = 20):
+        super().__init__()  # Also creates self.lock, held around emit(). The planner thread logs too.
         self.original_stdout = original_stdout
         self.lines: List[str] = []
         self.max_lines = max_lines
+        self.version = 0  # Bumped whenever a line is added, so the GUI knows when to redraw the log.
         self._buffer = ""
 
-    def write(self, text: str):
+    def emit(self, record: logging.LogRecord):
+        self._write(self.format(record) + "\n")
+
+    def _write(self, text: str):
         self.original_stdout.write(text)  # Still print to console
         self._buffer += text
         while "\n" in self._buffer:
             line, _, self._buffer = self._buffer.partition("\n")
             self.lines.append(line.replace("\r", "").strip() or "")
+            self.version += 1
             if len(self.lines) > self.max_lines:
                 self.lines.pop(0)
 
     def flush(self):
+        self.acquire()
+        try:
+            self._flush()
+        finally:
+            self.release()
+
+    def _flush(self):
         self.original_stdout.flush()
         if self._buffer.strip():
             self.lines.append(self._buffer.strip())
+            self.version += 1
             self._buffer = ""
             if len(self.lines) > self.max_lines:
                 self.lines.pop(0)
 
 
-# Load button images
-start_img = pygame.image.load("Assets/start_btn.png").convert_alpha()
-exit_img = pygame.image.load("Assets/exit_btn.png").convert_alpha()
-
 class AlgoApp(ABC):
-    def __init__(self, obstacles: List[Obstacle]):
+    def __init__(self, obstacles: List[Obstacle], config: PlannerConfig = None):
         self.grid = Grid(obstacles)
-        self.robot = Robot(self.grid)
-        
-        self.start_button = Button(1400, 700, start_img, 0.25)
-        self.exit_button = Button(1400, 850, exit_img, 0.35)
-       # self.reset_button = Button(1000, 557, reset_img, 0.9)
+        self.robot = Robot(self.grid, config)
 
     @abstractmethod
     def init(self):
@@ -63,17 +79,65 @@ class AlgoSimulator(AlgoApp):
     """
     Run the algorithm using a GUI simulator.
     """
-    def __init__(self, obstacles: List[Obstacle]):
-        super().__init__(obstacles)
+    # Legend entries drawn next to the arena: (label, colour, y-coordinate).
+    LEGEND = [
+        ("Image", DARK_YELLOW, 260),
+        ("Virtual obstacle border", RED, 310),
+        ("Forbidden", DARK_GREY, 360),
+        ("Allowed", WHITE, 410),
+    ]
+
+    def __init__(self, obstacles: List[Obstacle], trace: TraceRecorder = None, replay: Trace = None,
+                 remote: str = None):
+        """
+        trace -> If given, the planning run is recorded into it.
+        replay -> If given, a trace read with read_trace(). Pressing start then replays its search and plan instead
+                  of planning, so obstacles should be replay.obstacles.
+        remote -> If given, the URL of a backend's /telemetry. Pressing start then has the backend plan and stream the
+                  robot's poses, which are only drawn here. The robot moves at the simulation speed set at that time.
+        """
+        # The planner logs to a logger of our own, which is not registered with logging, so that nothing else
+        # running in the process ends up in our log panel.
+        self.log_buffer = LogBuffer(sys.stdout, max_lines=18)
+        log = logging.Logger("simulator", logging.INFO)
+        log.addHandler(self.log_buffer)
+        super().__init__(obstacles, PlannerConfig(log=log, trace=trace))
 
         self.running = False
         self.size = self.width, self.height = WINDOW_SIZE
         self.screen = self.clock = None
+        self.start_button = self.exit_button = None
         self.time_cal = False
         self.timer_start = None
         self.elapsed = 0
-        self.log_buffer = None
-        self._original_stdout = sys.stdout
+
+        # Simulated time runs in fixed ticks of 1 / FRAMES seconds, independently of the render rate.
+        self.sim_speed = SIM_SPEED_MULTIPLIERS[0]
+        self.sim_accumulator = 0.0
+
+        # Path planning runs on a worker thread, which reports its progress through this queue.
+        self.planner = None
+        self.planner_events = queue.Queue()
+        self.planned_legs = self.total_legs = self.attempt = 0
+        self.status_text = ""
+
+        # Replaying a recorded trace happens on the simulation ticks instead, see step_replay().
+        self.replay = replay
+        self.remote = remote
+        self.replay_events = None  # Iterator over the events left to replay, None when not replaying.
+        self.search_dirty = []  # Areas of the background drawn on by the replay since the last frame.
+
+        # Rendering caches, created once in init().
+        self.fonts = {}
+        self.background = None
+        self.log_area = pygame.Rect(1310, 45, 580, 200)
+        self.timer_bg = pygame.Rect(1320, 600, 200, 60)
+        self.status_area = pygame.Rect(1320, 555, 560, 36)
+        self.redraw_all = True
+        self.robot_bounds = None
+        self.timer_text = None
+        self.log_version = None
+        self.drawn_status = None
 
     def init(self):
         """
@@ -82,21 +146,66 @@ class AlgoSimulator(AlgoApp):
         pygame.init()
         self.running = True
 
-        self.log_buffer = LogBuffer(self._original_stdout, max_lines=18)
-        sys.stdout = self.log_buffer
-
         self.screen = pygame.display.set_mode(self.size, pygame.FULLSCREEN)  # pygame.HWSURFACE | pygame.DOUBLEBUF pygame.RESIZABLE
         self.clock = pygame.time.Clock()
 
+        self.start_button = Button(1400, 700, get_image("start_btn.png"), 0.25)
+        self.exit_button = Button(1400, 850, get_image("exit_btn.png"), 0.35)
+       # self.reset_button = Button(1000, 557, reset_img, 0.9)
+
+        self.fonts = {
+            "title": pygame.font.SysFont("Helvetica", 26),
+            "label": pygame.font.SysFont("Helvetica", 24),
+            "log": pygame.font.SysFont("Consolas", 14),
+            "timer": pygame.font.SysFont("Helvetica", 32),
+            "splash": pygame.font.SysFont("Helvetica", 35),
+        }
+        self.background = self.build_background()
+
         # Inform user that it is finding path...
         pygame.display.set_caption("Calculating path...")
-        font = pygame.font.SysFont("Helvetica", 35)
-        text = font.render("Calculating path...", True, WHITE)
+        text = self.fonts["splash"].render("Calculating path...", True, WHITE)
         text_rect = text.get_rect()
         text_rect.center = WINDOW_SIZE[0] / 2, WINDOW_SIZE[1] / 2
         self.screen.blit(text, text_rect)
         pygame.display.flip()
 
+    def build_background(self):
+        """
+        Pre-render everything that does not change between frames: the arena, obstacles, legend and buttons.
+        """
+        background = pygame.Surface(self.screen.get_size())
+
+        rect_outer = pygame.Rect(0, 0, 1300, 1200)
+        background.fill(DARK_BLACK, rect=rect_outer)
+
+        rect_grid = pygame.Rect(0, 0, 1000, 1000)
+        background.fill(MINT, rect=rect_grid)
+
+        # Title
+        title = self.fonts["title"].render("Algorithm Simulator", True, WHITE)
+        background.blit(title, (1000, 10))
+
+        # Legend
+        for label, colour, y in self.LEGEND:
+            text = self.fonts["label"].render(label, True, colour)
+            background.blit(text, (1040, y))
+            background.fill(colour, rect=pygame.Rect(1010, y + 4, 20, 20))
+
+        # Log panel frame
+        pygame.draw.rect(background, DARK_BLACK, self.log_area)
+        pygame.draw.rect(background, DARK_GREY, self.log_area, 1)
+
+        # Timer background
+        background.fill(DARK_BLACK, self.timer_bg)
+
+        self.grid.draw(background)
+
+        for button in (self.start_button, self.exit_button):
+            background.blit(button.image, button.rect)
+
+        return background
+
     def settle_events(self):
         """
         Process Pygame events.
@@ -105,146 +214,320 @@ class AlgoSimulator(AlgoApp):
             # On quit, stop the game loop. This will stop the app.
             if event.type == pygame.QUIT:
                 self.running = False
+            elif event.type == pygame.KEYDOWN and pygame.K_1 <= event.key < pygame.K_1 + len(SIM_SPEED_MULTIPLIERS):
+                self.set_sim_speed(SIM_SPEED_MULTIPLIERS[event.key - pygame.K_1])
 
-    def do_updates(self):
-        self.robot.update()
-
-    def render(self):
+    def set_sim_speed(self, speed):
         """
-        Render the screen.
+        Change the simulation speed multiplier. None runs the simulation as fast as possible.
         """
-        if self.timer_start is not None:
-            self.elapsed = time.time() - self.timer_start
-
-        rect_outer= pygame.Rect(0, 0, 1300, 1200)
-        self.screen.fill(DARK_BLACK, rect=rect_outer)
+        self.sim_speed = speed
+        self.sim_accumulator = 0.0
+        pygame.display.set_caption(f"Simulation speed: {'max' if speed is None else f'{speed}x'}")
 
-        rect_grid = pygame.Rect(0, 0, 1000, 1000)
-        self.screen.fill(MINT, rect=rect_grid)
-
-        # Title 1
-        font1 = pygame.font.SysFont("Helvetica", 26)
-        text1 = font1.render("Algorithm Simulator", True, WHITE)
-        text_rect1 = text1.get_rect()
-        text_rect1 = 1000, 10
-        self.screen.blit(text1, text_rect1)
-
-        # Log panel (top right)
-        if self.log_buffer:
-            log_font = pygame.font.SysFont("Consolas", 14)
-            log_area = pygame.Rect(1310, 45, 580, 200)
-            pygame.draw.rect(self.screen, DARK_BLACK, log_area)
-            pygame.draw.rect(self.screen, DARK_GREY, log_area, 1)
-            line_height = 16
-            max_visible = min(len(self.log_buffer.lines), log_area.height // line_height - 1)
-            start_idx = max(0, len(self.log_buffer.lines) - max_visible)
-            for i, line in enumerate(self.log_buffer.lines[start_idx:start_idx + max_visible]):
-                if line:
-                    truncated = line[:60] + "..." if len(line) > 60 else line
-                    log_surface = log_font.render(truncated, True, WHITE)
-                    self.screen.blit(log_surface, (log_area.x + 4, log_area.y + 4 + i * line_height))
-
-        # Label 1
-        font2 = pygame.font.SysFont("Helvetica", 24)
-        text2 = font2.render("Image", True, DARK_YELLOW)
-        text_rect2 = text2.get_rect()
-        text_rect2 = 1040, 260
-        self.screen.blit(text2, text_rect2)
-        rect_label = pygame.Rect(1010, 264, 20, 20)
-        self.screen.fill(DARK_YELLOW, rect=rect_label)
-
-        # Label 2
-        font4 = pygame.font.SysFont("Helvetica", 24)
-        text4 = font4.render("Virtual obstacle border", True, RED)
-        text_rect4 = text4.get_rect()
-        text_rect4 = 1040, 310
-        self.screen.blit(text4, text_rect4)
-        rect_label2 = pygame.Rect(1010, 314, 20, 20)
-        self.screen.fill(RED, rect=rect_label2)
-
-        # Label 3
-        font3 = pygame.font.SysFont("Helvetica", 24)
-        text3 = font3.render("Forbidden", True, DARK_GREY)
-        text_rect3 = text3.get_rect()
-        text_rect3 = 1040, 360
-        self.screen.blit(text3, text_rect3)
-        rect_label3 = pygame.Rect(1010, 364, 20, 20)
-        self.screen.fill(DARK_GREY, rect=rect_label3)
-
-        # Label 4
-        font5 = pygame.font.SysFont("Helvetica", 24)
-        text5 = font5.render("Allowed", True, WHITE)
-        text_rect5 = text5.get_rect()
-        text_rect5 = 1040, 410
-        self.screen.blit(text5, text_rect5)
-        rect_label4 = pygame.Rect(1010, 414, 20, 20)
-        self.screen.fill(WHITE, rect=rect_label4)
-
-        self.grid.draw(self.screen)
-        self.robot.draw(self.screen)
-
-        # Draw start and exit buttons
-        if self.start_button.draw():
-            self.timer_start = time.time()
-            # Calculate the path.
-            start = time.time()
-            self.robot.brain.plan_path()
-            time_delta = str(time.time() - start)
-            print(time_delta)
+    def plan_in_background(self):
+        """
+        Body of the planner thread.
+        """
+        start = time.time()
+        try:
+            self.robot.brain.plan_path(on_progress=lambda event, data: self.planner_events.put((event, data)))
+        except Exception as e:
+            self.planner_events.put(("error", e))
+            raise
+        self.robot.brain.log.info(f"Planning took {time.time() - start:.2f}s")
 
-        if self.exit_button.draw():
-            self.running = False
+    def receive_remote(self):
+        """
+        Body of the thread receiving telemetry from the backend, which takes the planner thread's place.
+        """
+        # Telemetry is streamed in real time, so "as fast as possible" becomes the fastest fixed speed.
+        speed = self.sim_speed or max(speed for speed in SIM_SPEED_MULTIPLIERS if speed is not None)
+        try:
+            # A pose for every frame drawn.
+            for event, data in receive_telemetry(layout_string(self.grid.obstacles), self.remote, FRAMES, speed):
+                self.planner_events.put((event, data))
+        except Exception as e:
+            self.planner_events.put(("error", e))
+            raise
+
+    def start_planning(self):
+        if self.planner is not None or self.replay_events is not None:
+            return
+        if self.replay is not None:
+            self.replay_events = iter(self.replay.events)
+            self.status_text = f"Replaying {self.replay.expansions()} expansions..."
+            return
+        self.status_text = "Planning..."
+        target = self.receive_remote if self.remote is not None else self.plan_in_background
+        self.planner = threading.Thread(target=target, name="planner", daemon=True)
+        self.planner.start()
+
+    def process_planner_events(self):
+        """
+        Apply progress reported by the planner thread. Legs are queued on the robot as soon as they are planned, so
+        it starts moving while the remaining legs are still being computed.
+        """
+        while True:
+            try:
+                event, data = self.planner_events.get_nowait()
+            except queue.Empty:
+                return
+
+            if event == "attempt":
+                # A new obstacle ordering is tried, so whatever was executed so far is void.
+                self.attempt += 1
+                self.planned_legs = 0
+                self.total_legs = len(data)
+                self.robot.reset()
+                self.elapsed = 0
+                self.redraw_all = True
+            elif event == "leg":
+                self.planned_legs += 1
+                self.robot.queue_commands(data[1])
+            elif event == "done":
+                index_list, complete = data
+                if not complete:
+                    # The final commands come from an earlier attempt than the one being executed. The robot carried
+                    # them out already during that attempt, so it gets copies to carry out again.
+                    self.robot.reset()
+                    self.robot.queue_commands([command.copy() for command in self.robot.brain.commands])
+                    self.elapsed = 0
+                    self.redraw_all = True
+                self.status_text = f"Path found through {index_list}" if complete else "No complete path found!"
+                continue
+            elif event == "error":
+                self.status_text = f"Planning failed: {data}"
+                continue
+            elif event == "plan":
+                # Planned by the backend, see receive_remote().
+                if data["planning_time"] is not None:
+                    self.robot.brain.log.info(f"Backend planning took {data['planning_time']:.2f}s")
+                self.status_text = data["error"] or f"Path found through {data['visited']}"
+                continue
+            elif event == "poses":
+                self.follow_poses(data)
+                continue
+            self.status_text = f"Planning leg {min(self.planned_legs + 1, self.total_legs)}/{self.total_legs} " \
+                               f"(ordering #{self.attempt})"
+
+    def follow_poses(self, poses):
+        """
+        Move the robot through poses streamed by the backend.
+        """
+        for kind, _, elapsed, x, y, angle in poses:
+            if kind == POSE_START:
+                self.robot.reset()
+                self.redraw_all = True
+            self.robot.follow_pose(x, y, angle, kind in (POSE_COMMAND, POSE_DONE))
+            self.elapsed = elapsed
+
+    def step_replay(self):
+        """
+        Replay the next REPLAY_EXPANSIONS_PER_TICK expansions of the trace. Legs are queued on the robot as they
+        come, like process_planner_events() does while planning.
+        """
+        expansions = 0
+        while expansions < REPLAY_EXPANSIONS_PER_TICK:
+            kind, values = next(self.replay_events, (None, None))
+            if kind is None:
+                self.finish_replay()
+                return
+            if kind == RECORD_ATTEMPT:
+                # A new obstacle ordering is tried, so whatever was searched and executed so far is void.
+                self.robot.reset()
+                self.elapsed = 0
+                self.background = self.build_background()
+                self.search_dirty = []
+                self.redraw_all = True
+            elif kind == RECORD_COMMAND:
+                self.robot.queue_commands(values)
+            elif kind == RECORD_EXPAND:
+                self.draw_expansion(*values)
+                expansions += 1
+
+    def finish_replay(self):
+        self.replay_events = None
+        if not self.replay.complete:
+            # The final commands come from an earlier attempt than the one being executed.
+            self.robot.reset()
+            self.robot.queue_commands([command.copy() for command in self.replay.commands])
+            self.elapsed = 0
+            self.redraw_all = True
+        visited = [command.obj_index for command in self.replay.commands if isinstance(command, ScanCommand)]
+        self.status_text = f"Replayed path through {visited}" if self.replay.complete else \
+            "Replayed, no complete path found!"
+
+    def draw_expansion(self, x, y, angle, g, h, parent_x, parent_y):
+        """
+        Mark an expanded state on the background, with a line from the cell it was reached from.
+        """
+        pos = Position(x, y).xy_pygame()
+        area = pygame.draw.circle(self.background, ORANGE, pos, 2)
+        if not math.isnan(parent_x):
+            area.union_ip(pygame.draw.line(self.background, ORANGE, Position(parent_x, parent_y).xy_pygame(), pos))
+        self.search_dirty.append(area)
 
-       # if self.reset_button.draw():
-           # pass
+    def sim_tick(self):
+        """
+        Advance the simulation by one fixed tick of 1 / FRAMES seconds.
+        """
+        if self.replay_events is not None:
+            self.step_replay()
+        if self.timer_start is not None and self.robot.has_pending_commands():
+            self.elapsed += 1 / FRAMES
+        self.robot.update()
 
-        # Timer display
-        # Timer display
-        timer_font = pygame.font.SysFont("Helvetica", 32)
+    def do_updates(self, dt):
+        """
+        Run as many simulation ticks as the real time dt (in seconds) is worth at the current speed. Ticks that
+        fall within the same frame are not rendered individually.
+        """
+        self.process_planner_events()
+        if self.sim_speed is None:
+            # Spend most of the frame budget simulating, leaving the rest for rendering.
+            deadline = time.perf_counter() + 0.8 / FRAMES
+            self.sim_tick()
+            while (self.robot.has_pending_commands() or self.replay_events is not None) and \
+                    time.perf_counter() < deadline:
+                self.sim_tick()
+            return
+
+        self.sim_accumulator += min(dt, SIM_MAX_FRAME_TIME) * self.sim_speed
+        while self.sim_accumulator >= 1 / FRAMES:
+            self.sim_accumulator -= 1 / FRAMES
+            self.sim_tick()
+
+    def draw_arena(self, area):
+        """
+        Restore the given area from the background and draw the moving parts of the arena over it.
+        """
+        self.screen.set_clip(area)
+        self.screen.blit(self.background, area, area)
+        self.robot.draw(self.screen)
+        self.screen.set_clip(None)
 
+    def draw_timer(self):
         mins = int(self.elapsed // 60)
         secs = int(self.elapsed % 60)
         millis = int((self.elapsed * 100) % 100)
 
         timer_text = f"{mins:02}:{secs:02}.{millis:02}"
-        timer_surface = timer_font.render(timer_text, True, WHITE)
+        if timer_text == self.timer_text:
+            return None
+        self.timer_text = timer_text
 
+        timer_surface = self.fonts["timer"].render(timer_text, True, WHITE)
         timer_rect = timer_surface.get_rect()
 
         # Align vertically with buttons
         timer_rect.centerx = 1400   # same column as buttons
         timer_rect.y = 620          # slightly above start button
 
-        timer_bg = pygame.Rect(1320, 600, 200, 60)
-        self.screen.fill(DARK_BLACK, timer_bg)
-
+        self.screen.blit(self.background, self.timer_bg, self.timer_bg)
         self.screen.blit(timer_surface, timer_rect)
+        return self.timer_bg.union(timer_rect)
+
+    def draw_status(self):
+        if self.status_text == self.drawn_status:
+            return None
+        self.drawn_status = self.status_text
+
+        self.screen.blit(self.background, self.status_area, self.status_area)
+        text = self.fonts["label"].render(self.status_text, True, WHITE)
+        self.screen.blit(text, self.status_area.topleft)
+        return self.status_area
+
+    def draw_log(self):
+        """
+        Redraw the log panel (top right), but only if new lines were logged since the last frame.
+        """
+        if self.log_buffer.version == self.log_version:
+            return None
+        self.log_version = self.log_buffer.version
+
+        log_area = self.log_area
+        self.screen.blit(self.background, log_area, log_area)
+        line_height = 16
+        with self.log_buffer.lock:
+            lines = list(self.log_buffer.lines)
+        max_visible = min(len(lines), log_area.height // line_height - 1)
+        start_idx = max(0, len(lines) - max_visible)
+        for i, line in enumerate(lines[start_idx:start_idx + max_visible]):
+            if line:
+                truncated = line[:60] + "..." if len(line) > 60 else line
+                log_surface = self.fonts["log"].render(truncated, True, WHITE)
+                self.screen.blit(log_surface, (log_area.x + 4, log_area.y + 4 + i * line_height))
+        return log_area
+
+    def render(self):
+        """
+        Render the screen.
+
+        Only the regions that changed since the previous frame (robot, timer and log panel) are redrawn and pushed
+        to the display; the static parts are blitted from the cached background.
+        """
+        dirty = []
+        robot_bounds = self.robot.get_bounds()
+        if self.redraw_all:
+            self.screen.blit(self.background, (0, 0))
+            self.draw_arena(self.screen.get_rect())
+            self.timer_text = self.log_version = self.drawn_status = None
+        else:
+            if robot_bounds != self.robot_bounds:
+                self.search_dirty += [robot_bounds, self.robot_bounds]
+            if self.search_dirty:
+                area = self.search_dirty[0].unionall(self.search_dirty[1:])
+                self.draw_arena(area)
+                dirty.append(area)
+        self.robot_bounds = robot_bounds
+        self.search_dirty = []
+
+        # Handle start and exit buttons
+        if self.start_button.handle_click():
+            self.timer_start = time.time()
+            # Calculate the path without blocking the GUI.
+            self.start_planning()
+
+        if self.exit_button.handle_click():
+            self.running = False
+
+       # if self.reset_button.draw():
+           # pass
+
+        dirty.append(self.draw_timer())
+        dirty.append(self.draw_status())
+        dirty.append(self.draw_log())
 
         # Really render now.
-        pygame.display.flip()
+        if self.redraw_all:
+            self.redraw_all = False
+            pygame.display.flip()
+        else:
+            pygame.display.update([rect for rect in dirty if rect is not None])
 
     def execute(self):
         """
         Initialise the app and start the game loop.
         """
-        try:
-            while self.running:
-                # Check for Pygame events.
-                self.settle_events()
-                # Do required updates.
-                self.do_updates()
-                # Render the new frame.
-                self.render()
-        finally:
-            sys.stdout = self._original_stdout
+        while self.running:
+            # Wait for the next frame; this caps the render rate and lets the CPU idle in between.
+            dt = self.clock.tick(FRAMES) / 1000
+            # Check for Pygame events.
+            self.settle_events()
+            # Do required updates.
+            self.do_updates(dt)
+            # Render the new frame.
+            self.render()
 
 
 class AlgoMinimal(AlgoApp):
     """
     Minimal app to just calculate a path and then send the commands over.
     """
-    def __init__(self, obstacles):
+    def __init__(self, obstacles, transmitter=None):
         super().__init__(obstacles)
+        self.transmitter = transmitter
 
     def init(self):
         pass
@@ -252,4 +535,6 @@ class AlgoMinimal(AlgoApp):
     def execute(self):
         print("Calculating path...")
         index_list = self.robot.brain.plan_path()
+        if self.transmitter is not None:
+            self.transmitter.send_plan(self.robot.convert_commands())
         return index_list
\ No newline at end of file
@@ -1,16 +1,39 @@
-from fastapi import FastAPI
-from pydantic import BaseModel
+import asyncio
+import json
+import multiprocessing
+import os
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Optional
 
+from fastapi import FastAPI, HTTPException, WebSocket, WebSocketDisconnect, status
+from fastapi.responses import Response, StreamingResponse
+from pydantic import BaseModel, Field, ValidationError
+
+from Comms.telemetry import PoseStream
 from Map.obstacle import Obstacle
-from Settings.attributes import Direction
-from Simulator.simulator import AlgoSimulator
+from Map.position import RobotPosition
+from Robot.commands import command_from_message
+from Robot.cancellation import Cancellation, PlanningCancelled
+from Robot.path_mgr import PlannerConfig
+from Robot.planner import Plan, plan
+from profiling import StackSampler
+from Settings.attributes import *
 
 import logging
 
 logger = logging.getLogger("uvicorn")
 
+PLAN_WORKERS = os.cpu_count()  # Number of processes planning batch layouts in parallel.
+PROFILE_INTERVAL = 0.001  # Seconds between stack samples when a request asks to be profiled.
+PLAN_TIMEOUT = 120  # Seconds a request may spend planning unless it asks for something else.
+RENDER_CACHE_SIZE = 32  # Layouts whose plans and renders are kept for /plan/render.
 
 app = FastAPI()
+_pool = None
+_manager = None
+_rendered = OrderedDict()  # Newest last: layout -> RenderedPlan.
 
 
 # Request body = raw string
@@ -18,6 +41,42 @@ class RunRequest(BaseModel):
     data: str
 
 
+# Request body = raw strings, one per layout
+class BatchRequest(BaseModel):
+    layouts: List[str]
+    # If set, each layout is planned under a sampling profiler, whose samples are returned as its "profile".
+    profile: bool = False
+    # Seconds after which layouts still being planned are given up on. None waits for them all.
+    timeout: Optional[float] = PLAN_TIMEOUT
+
+
+# Request sent as JSON when opening /telemetry
+class TelemetryRequest(BaseModel):
+    data: str
+    # Messages of poses per second. There is no point in more than one per simulation tick.
+    rate: float = Field(TELEMETRY_RATE, gt=0, le=FRAMES)
+    # Simulated seconds per second.
+    speed: float = Field(1.0, gt=0)
+
+
+# Request body = raw string, and the frames wanted per simulated second, or None for a single picture
+class RenderRequest(BaseModel):
+    data: str
+    rate: Optional[float] = Field(None, gt=0, le=FRAMES)
+
+
+class RenderedPlan:
+    def __init__(self, planning):
+        """
+        A layout's plan and what has been rendered of it so far, see /plan/render. Both are futures, so that
+        requests for the same layout arriving together share the work.
+
+        renders -> By rate, as in RenderRequest.
+        """
+        self.planning = planning
+        self.renders = {}
+
+
 DIRECTION_MAP = {
     "T": Direction.TOP,
     "B": Direction.BOTTOM,
@@ -48,6 +107,105 @@ def parse_obstacles(raw: str):
 
     return obstacles
 
+def get_pool():
+    """
+    Get the worker pool used for planning, starting it on first use.
+    """
+    global _pool
+    if _pool is None:
+        _pool = ProcessPoolExecutor(max_workers=PLAN_WORKERS)
+    return _pool
+
+
+def get_manager():
+    """
+    Get the process serving the events that cancel planning in the worker pool, starting it on first use.
+    """
+    global _manager
+    if _manager is None:
+        _manager = multiprocessing.Manager()
+    return _manager
+
+
+def plan_layout(index: int, raw: str, profile: bool = False, cancel: Cancellation = None) -> dict:
+    """
+    Plan a path for one layout without any rendering. Runs in a worker process.
+
+    If profile is set, planning runs under a StackSampler and its samples are returned as "profile", in collapsed
+    stack format. They are returned even if planning fails.
+
+    If cancel is given, planning stops as soon as it says so, and the result only has an error.
+    """
+    result = {"index": index, "data": raw, "commands": [], "index_list": [], "visited": [], "missed": [],
+              "unreachable": {}, "planning_time": None, "mission_time": None, "error": None}
+    start = time.perf_counter()
+    try:
+        obstacles = parse_obstacles(raw)
+        config = PlannerConfig(cancel=cancel)
+        if profile:
+            sampler = StackSampler(PROFILE_INTERVAL)
+            try:
+                with sampler:
+                    layout_plan = plan(obstacles, config=config)
+            finally:
+                result["profile"] = sampler.collapsed()
+        else:
+            layout_plan = plan(obstacles, config=config)
+    except PlanningCancelled as e:
+        result["error"] = f"Planning stopped: {e}"
+        return result
+    except Exception as e:
+        result["error"] = f"{type(e).__name__}: {e}"
+        return result
+    result["planning_time"] = time.perf_counter() - start
+
+    visited = layout_plan.visited()
+    result["commands"] = layout_plan.messages()
+    result["index_list"] = layout_plan.index_list
+    result["visited"] = visited
+    result["missed"] = [obstacle.index for obstacle in obstacles if obstacle.index not in visited]
+    result["mission_time"] = layout_plan.mission_time()
+    result["unreachable"] = layout_plan.unreachable
+    if result["missed"]:
+        reasons = [f"{index} ({layout_plan.unreachable.get(index, 'no path found')})" for index in result["missed"]]
+        result["error"] = f"Could not visit obstacles {', '.join(reasons)}"
+    return result
+
+
+def plan_for_render(raw: str) -> Plan:
+    """
+    Plan a layout to be rendered. Runs in a worker process.
+    """
+    return plan(parse_obstacles(raw), config=PlannerConfig(cancel=Cancellation.after(PLAN_TIMEOUT)))
+
+
+def render_layout(raw: str, layout_plan: Plan, rate: Optional[float]) -> bytes:
+    """
+    Render a planned layout, as a PNG if rate is None and as a zip archive of frames otherwise. Runs in a worker
+    process.
+    """
+    # Imported here so that only workers asked to render ever load pygame.
+    from Simulator.render import render_frames, render_png
+    obstacles = parse_obstacles(raw)
+    if rate is None:
+        return render_png(obstacles, layout_plan)
+    return render_frames(obstacles, layout_plan, rate)
+
+
+def get_rendered_plan(raw: str) -> RenderedPlan:
+    """
+    Get the cache entry of a layout, starting to plan it if there is none.
+    """
+    entry = _rendered.get(raw)
+    if entry is None:
+        planning = asyncio.get_running_loop().run_in_executor(get_pool(), plan_for_render, raw)
+        entry = _rendered[raw] = RenderedPlan(planning)
+        while len(_rendered) > RENDER_CACHE_SIZE:
+            _rendered.popitem(last=False)
+    _rendered.move_to_end(raw)
+    return entry
+
+
 @app.get("/")
 async def health_check():
     return {"status": "ok", "message": "Simulator API running"}
@@ -61,8 +219,132 @@ async def run_simulation(req: RunRequest):
 
     logger.info(f"Parsed obstacles: {obstacles}")
 
+    # Imported here so that the rest of the backend never needs pygame or a display.
+    from Simulator.simulator import AlgoSimulator
+
     sim = AlgoSimulator(obstacles)
     sim.init()
     sim.execute()
 
     return {"status": "simulation completed"}
+
+
+@app.post("/plan/batch")
+async def plan_batch(req: BatchRequest):
+    """
+    Plan many layouts in parallel. Results are streamed back as one JSON object per line, in the order they finish;
+    use "index" to match them to the layouts in the request.
+
+    With "profile" set, every result also has a "profile" of its planning, which can be saved to a file and fed to
+    flamegraph.pl or opened in speedscope.
+
+    Layouts still being planned when "timeout" runs out, or when the client goes away, are stopped, so that they do not
+    hold on to a worker.
+    """
+    logger.info(f"Planning batch of {len(req.layouts)} layouts{' with profiling' if req.profile else ''}")
+
+    loop = asyncio.get_running_loop()
+    pool = get_pool()
+    cancel = Cancellation.after(req.timeout, get_manager().Event())
+    futures = [loop.run_in_executor(pool, plan_layout, i, raw, req.profile, cancel)
+               for i, raw in enumerate(req.layouts)]
+
+    async def results():
+        try:
+            for future in asyncio.as_completed(futures):
+                yield json.dumps(await future) + "\n"
+        finally:
+            # Either everything is done, or the client disconnected and nobody wants the rest.
+            cancel.cancel()
+            for future in futures:
+                future.cancel()
+
+    return StreamingResponse(results(), media_type="application/x-ndjson")
+
+
+@app.post("/plan/render")
+async def render_plan(req: RenderRequest):
+    """
+    Draw a layout with its plan, without any display. Returns a PNG of the arena with the planned route and the path
+    driven, or with "rate" set, a zip archive of PNG frames of the robot driving it, "rate" per simulated second.
+
+    Nothing is planned or drawn until asked for. Plans and renders are cached by layout, so asking again, or for
+    another rate, does not plan again.
+    """
+    entry = get_rendered_plan(req.data)
+    try:
+        # Shielded, as a request going away would otherwise cancel work that is cached for other requests.
+        layout_plan = await asyncio.shield(entry.planning)
+    except Exception as e:
+        # Failures are not cached, so that the layout is planned again next time, e.g. after a timeout.
+        if _rendered.get(req.data) is entry:
+            del _rendered[req.data]
+        raise HTTPException(status.HTTP_400_BAD_REQUEST, f"{type(e).__name__}: {e}")
+
+    render = entry.renders.get(req.rate)
+    if render is None:
+        logger.info(f"Rendering {req.data}{f' at {req.rate} frames/s' if req.rate else ''}")
+        loop = asyncio.get_running_loop()
+        render = entry.renders[req.rate] = loop.run_in_executor(get_pool(), render_layout, req.data, layout_plan,
+                                                                req.rate)
+    try:
+        content = await asyncio.shield(render)
+    except Exception:
+        if entry.renders.get(req.rate) is render:
+            del entry.renders[req.rate]
+        raise
+    return Response(content, media_type="image/png" if req.rate is None else "application/zip")
+
+
+async def wait_for_disconnect(websocket: WebSocket):
+    while (await websocket.receive())["type"] != "websocket.disconnect":
+        pass
+
+
+@app.websocket("/telemetry")
+async def telemetry(websocket: WebSocket):
+    """
+    Plan one layout and stream the robot carrying out the plan, for a viewer to draw; see Comms/telemetry.py for the
+    messages. The viewer first sends a TelemetryRequest as JSON. Unlike /run, nothing is drawn here.
+
+    The connection is closed after the last pose. If the viewer goes away first, planning and streaming stop.
+    """
+    await websocket.accept()
+    try:
+        req = TelemetryRequest.model_validate_json(await websocket.receive_text())
+    except ValidationError as e:
+        await websocket.close(status.WS_1003_UNSUPPORTED_DATA, f"Invalid request: {e.error_count()} errors")
+        return
+    except WebSocketDisconnect:
+        return
+    logger.info(f"Streaming telemetry for {req.data} at {req.rate} poses/s")
+
+    loop = asyncio.get_running_loop()
+    cancel = Cancellation.after(PLAN_TIMEOUT, get_manager().Event())
+    disconnected = asyncio.create_task(wait_for_disconnect(websocket))
+    try:
+        planning = loop.run_in_executor(get_pool(), plan_layout, 0, req.data, False, cancel)
+        await asyncio.wait([planning, disconnected], return_when=asyncio.FIRST_COMPLETED)
+        if disconnected.done():
+            return
+        result = planning.result()
+        await websocket.send_text(json.dumps(result))
+
+        start = RobotPosition(ROBOT_START_X, ROBOT_START_Y, Direction.TOP, 90)  # As plan() starts from.
+        commands = [command_from_message(message) for message in result["commands"]]
+        stream = PoseStream(commands, start, req.rate, req.speed)
+        await websocket.send_bytes(stream.start_message())
+        # Messages are sent on a fixed schedule, so that time spent sending does not slow the robot down.
+        send_time = loop.time()
+        while not disconnected.done():
+            send_time += 1 / req.rate
+            await asyncio.sleep(max(send_time - loop.time(), 0))
+            await websocket.send_bytes(stream.next_message())
+            if stream.done():
+                await websocket.close()
+                break
+    except WebSocketDisconnect:
+        pass
+    finally:
+        cancel.cancel()
+        disconnected.cancel()
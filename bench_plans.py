@@ -0,0 +1,116 @@
+import argparse
+import json
+import math
+import os
+import statistics
+import sys
+import time
+
+from backend import parse_obstacles
+from layouts import TEST_CASES
+from Robot.path_mgr import PlannerConfig
+from Robot.planner import plan
+
+# Fixed layouts to plan, the same as test.py's. Changing them invalidates recorded baselines.
+CORPUS = [data for _, data in TEST_CASES]
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "bench_plans.json")
+
+# A planning time regression must be significant at this level (one-sided Mann-Whitney U test) ...
+TIME_ALPHA = 0.01
+# ... and make the median slower by more than this fraction.
+TIME_TOLERANCE = 0.20
+# Slack when comparing mission times, which are sums of floats.
+MISSION_TIME_TOLERANCE = 1e-6
+
+
+def measure(layout, runs):
+    """
+    Plan the layout runs times, after one warm-up run. Everything but the planning time is deterministic, so it is
+    taken from the last run. Legs are not reused between runs, so that every run does the same work.
+    """
+    obstacles = parse_obstacles(layout)
+    config = PlannerConfig(segment_cache=None)
+    plan(obstacles, config=config)
+    times = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        result = plan(obstacles, config=config)
+        times.append(time.perf_counter() - start)
+    return {"times": times, "expansions": result.expansions, "commands": len(result.commands),
+            "mission_time": result.mission_time(), "visited": len(result.visited())}
+
+
+def slower_p_value(current, baseline):
+    """
+    One-sided Mann-Whitney U test, with the normal approximation: the probability of current being at least this
+    much slower than baseline if both came from the same distribution.
+    """
+    u = sum((a > b) + (a == b) / 2 for a in current for b in baseline)
+    n1, n2 = len(current), len(baseline)
+    mean = n1 * n2 / 2
+    sd = math.sqrt(n1 * n2 * (n1 + n2 + 1) / 12)
+    z = (u - mean - 0.5) / sd  # With continuity correction.
+    return 0.5 * math.erfc(z / math.sqrt(2))
+
+
+def compare(current, baseline):
+    """
+    Get the regressions of one layout as a list of messages.
+    """
+    regressions = []
+    base_median, median = statistics.median(baseline["times"]), statistics.median(current["times"])
+    p = slower_p_value(current["times"], baseline["times"])
+    if p < TIME_ALPHA and median > base_median * (1 + TIME_TOLERANCE):
+        regressions.append(f"planning time {base_median * 1000:.1f} -> {median * 1000:.1f} ms (p={p:.4f})")
+    for key in ("expansions", "commands"):
+        if current[key] > baseline[key]:
+            regressions.append(f"{key} {baseline[key]} -> {current[key]}")
+    if current["mission_time"] > baseline["mission_time"] + MISSION_TIME_TOLERANCE:
+        regressions.append(f"mission time {baseline['mission_time']:.2f} -> {current['mission_time']:.2f} s")
+    if current["visited"] < baseline["visited"]:
+        regressions.append(f"visited {baseline['visited']} -> {current['visited']} obstacles")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check the planner for regressions in speed and plan quality.")
+    parser.add_argument("mode", choices=["record", "compare"],
+                        help="record a new baseline, or compare against the recorded one")
+    parser.add_argument("--runs", type=int, default=10, help="timed runs per layout (default: 10)")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="baseline file (default: %(default)s)")
+    args = parser.parse_args()
+
+    print(f"Planning {len(CORPUS)} layouts {args.runs} times each")
+    print("-" * 60)
+    results = {}
+    for layout in CORPUS:
+        results[layout] = result = measure(layout, args.runs)
+        print(f"{statistics.median(result['times']) * 1000:7.1f} ms {result['expansions']:6} expansions "
+              f"{result['commands']:3} commands {result['mission_time']:6.2f} s {result['visited']} visited")
+
+    if args.mode == "record":
+        with open(args.baseline, "w") as file:
+            json.dump(results, file, indent=1)
+        print(f"Baseline written to {args.baseline}")
+        return
+
+    with open(args.baseline) as file:
+        baseline = json.load(file)
+    print("-" * 60)
+    failed = False
+    for i, layout in enumerate(CORPUS):
+        if layout not in baseline:
+            print(f"Layout {i}: not in the baseline, skipped")
+            continue
+        for regression in compare(results[layout], baseline[layout]):
+            print(f"Layout {i}: {regression}")
+            failed = True
+    if failed:
+        print("FAIL: regressions found")
+        sys.exit(1)
+    print("OK: no regressions")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+import os
+import statistics
+import subprocess
+import sys
+
+# Modules a planner worker needs. None of them may import pygame or open a display.
+PLANNER_MODULES = ["Settings.attributes", "Map.grid", "Map.obstacle", "Robot.robot", "Robot.path_mgr"]
+
+PROBE = f"""
+import sys, time
+start = time.perf_counter()
+import {", ".join(PLANNER_MODULES)}
+print(time.perf_counter() - start, "pygame" in sys.modules)
+"""
+
+
+def measure_once():
+    """
+    Import the planner modules in a fresh interpreter, returning the import time in seconds and whether pygame got
+    imported along the way.
+    """
+    out = subprocess.run([sys.executable, "-c", PROBE], cwd=os.path.dirname(os.path.abspath(__file__)),
+                         capture_output=True, text=True, check=True).stdout.split()
+    return float(out[0]), out[1] == "True"
+
+
+def main():
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+
+    print(f"Measuring cold import of {', '.join(PLANNER_MODULES)} over {runs} runs")
+    print("-" * 60)
+
+    timings = []
+    pygame_imported = False
+    for _ in range(runs):
+        elapsed, imported = measure_once()
+        timings.append(elapsed)
+        pygame_imported |= imported
+
+    print(f"min {min(timings) * 1000:.1f} ms, median {statistics.median(timings) * 1000:.1f} ms, "
+          f"max {max(timings) * 1000:.1f} ms")
+    if pygame_imported:
+        print("FAIL: importing the planner pulled in pygame")
+        sys.exit(1)
+    print("OK: pygame was not imported")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,18 @@
+import argparse
 from Map.obstacle import Obstacle
 from Map.position import Position
-from Settings.attributes import Direction
+from Settings.attributes import Direction, TELEMETRY_URL
+from Robot.trace import TraceRecorder, read_trace
 from Simulator.simulator import AlgoSimulator
 
 def main():
+    parser = argparse.ArgumentParser(description="Run the algorithm simulator.")
+    parser.add_argument("--trace", metavar="FILE", help="record the planner's search into FILE")
+    parser.add_argument("--replay", metavar="FILE", help="replay a recorded search instead of planning")
+    parser.add_argument("--remote", metavar="URL", nargs="?", const=TELEMETRY_URL,
+                        help="have the backend plan and only draw what it streams (default URL: %(const)s)")
+    args = parser.parse_args()
+
     # Create test obstacles with adequate spacing
     # Format: Obstacle(x, y, direction, index)
     # x, y must be multiples of 10 with offset 5 (e.g., 5, 15, 25, 35, etc.)
@@ -17,9 +26,16 @@ def main():
         Obstacle(155, 115, Direction.TOP, 6),      # Mid-right
     ]
     
-    app = AlgoSimulator(obstacles)
+    trace = TraceRecorder.open(args.trace) if args.trace else None
+    if args.replay:
+        replay = read_trace(args.replay)
+        app = AlgoSimulator(replay.obstacles, replay=replay)
+    else:
+        app = AlgoSimulator(obstacles, trace=trace, remote=args.remote)
     app.init()
     app.execute()
+    if trace is not None:
+        trace.close()
 
 if __name__ == "__main__":
     main()
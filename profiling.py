@@ -0,0 +1,57 @@
+import os
+import sys
+import threading
+from collections import Counter
+
+
+class StackSampler:
+    """
+    Sampling profiler for the thread that enters it. A background thread records that thread's call stack every
+    interval seconds, for as long as the sampler is entered:
+
+        with StackSampler(0.001) as sampler:
+            work()
+        print(sampler.collapsed())
+
+    The sampling thread needs the GIL to take a sample, so while entered, the interpreter's switch interval is
+    lowered to interval for the whole process.
+    """
+    def __init__(self, interval):
+        self.interval = interval
+        self.counts = Counter()  # Number of samples of each stack, as a tuple of frames from the outermost.
+        self._target = None
+        self._stop = threading.Event()
+        self._thread = None
+        self._switch_interval = None
+
+    def __enter__(self):
+        self._target = threading.get_ident()
+        self._stop.clear()
+        self._switch_interval = sys.getswitchinterval()
+        sys.setswitchinterval(min(self._switch_interval, self.interval))
+        self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        sys.setswitchinterval(self._switch_interval)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self._target)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                frame = frame.f_back
+            if stack:
+                self.counts[tuple(reversed(stack))] += 1
+
+    def collapsed(self) -> str:
+        """
+        Get the samples in collapsed stack format, one "outer;...;inner count" line per stack, as read by
+        flamegraph.pl, speedscope and similar tools.
+        """
+        return "".join(f"{';'.join(stack)} {count}\n" for stack, count in self.counts.most_common())